@@ -0,0 +1,67 @@
+# backtest.py
+
+import argparse
+import csv
+import glob
+import json
+import os
+from collections import Counter
+from modules.database_handler import DatabaseHandler
+from modules.backtester import Backtester
+from modules.time_utils import date_to_epoch, now_epoch
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def main():
+    """Answers 'how often would this rule have fired?' over a historical range."""
+    parser = argparse.ArgumentParser(description="Backtest SecLog rules over historical logs.")
+    parser.add_argument("--from", dest="start", required=True, help="First day, YYYY-MM-DD.")
+    parser.add_argument("--to", dest="end", help="Last day, YYYY-MM-DD (default: now).")
+    parser.add_argument("--rule", action="append", help="Rule name to backtest (repeatable; default: all enabled rules).")
+    parser.add_argument("--threshold", type=positive_int, help="Override the threshold of the selected simple rules.")
+    parser.add_argument("--rules-file", default=RULES_PATH)
+    parser.add_argument("--db", default="data/seclog.db")
+    parser.add_argument("--archives", nargs="*", default=[],
+                        help="Archive files or glob patterns to include (e.g. data/logs_archive/*.csv.gz).")
+    parser.add_argument("--output", help="Write the alert timeline to a .csv or .json file.")
+    args = parser.parse_args()
+
+    start_time = date_to_epoch(args.start)
+    end_time = date_to_epoch(args.end, days=1) - 1 if args.end else now_epoch()
+    archive_paths = []
+    for pattern in args.archives:
+        archive_paths.extend(sorted(glob.glob(pattern)) or [pattern])
+
+    # Retention is skipped so a backtest never archives the logs it is about to read
+    db_handler = DatabaseHandler(db_path=args.db, retention_days=None)
+    backtester = Backtester(db_handler, rules_filepath=args.rules_file)
+    alerts = backtester.run(start_time, end_time, rule_names=args.rule,
+                            threshold=args.threshold, archive_paths=archive_paths)
+    db_handler.close()
+
+    for alert in alerts:
+        print(f"🚨 [{alert['trigger_time']} -> {alert['end_time']}] {alert['rule_name']} (peak count: {alert['count']})")
+    print("--- Alerts per rule ---")
+    for rule_name, count in Counter(alert["rule_name"] for alert in alerts).most_common():
+        print(f"  {rule_name}: {count}")
+    print(f"{len(alerts)} alert(s) would have fired.")
+
+    if args.output:
+        if args.output.lower().endswith(".json"):
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(alerts, f, indent=2)
+        else:
+            with open(args.output, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=list(alerts[0].keys()) if alerts else ["rule_name"])
+                writer.writeheader()
+                writer.writerows(alerts)
+        print(f"Timeline written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,548 @@
+# benchmark.py
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from itertools import islice
+
+from modules.anomaly_detector import AnomalyDetector
+from modules.backtester import Backtester
+from modules.database_handler import DatabaseHandler
+from modules.facet_index import FacetIndex
+from modules.ingest_journal import IngestJournal
+from modules.ingest_pipeline import IngestPipeline
+from modules.metrics import metrics
+from modules.log_normalizer import LogNormalizer
+from modules.rule_engine import RuleEngine
+from modules.correlation_engine import CorrelationEngine
+from modules.synthetic_events import SyntheticEventGenerator
+from modules.time_histogram import TimeHistogram
+from modules.time_utils import date_to_epoch, format_epoch, now_epoch
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+RESULTS_DIR = os.path.join("data", "benchmarks")
+CHUNK_SIZE = 50_000
+# Cases that need their events in memory at once (a burst, a UI result set) use at most this many
+IN_MEMORY_ROWS = 200_000
+
+def _normalized_chunks(size, args, span_minutes=None, chunk_rows=CHUNK_SIZE, end_time=None):
+    """Yields `size` synthetic events as lists of `chunk_rows` LogRecords; pass `end_time` to regenerate the same corpus."""
+    normalizer = LogNormalizer()
+    raws = SyntheticEventGenerator(seed=args.seed).generate(size, end_time=end_time, span_minutes=span_minutes or args.span_days * 24 * 60)
+    return iter(lambda: [normalizer.normalize("windows", raw) for raw in islice(raws, chunk_rows)], [])
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def _entry(seconds, rows=None):
+    entry = {"seconds": round(seconds, 4)}
+    if rows is not None:
+        entry["rows"] = rows
+        entry["rows_per_sec"] = round(rows / seconds, 1) if seconds > 0 else None
+    return entry
+
+def bench_pipeline(size, args, workdir):
+    """Drives normalize -> insert -> query -> rules -> correlation over `size` synthetic events."""
+    generator = SyntheticEventGenerator(seed=args.seed)
+    normalizer = LogNormalizer()
+    db = DatabaseHandler(db_path=os.path.join(workdir, "bench.db"), archive_path=os.path.join(workdir, "archive"))
+
+    normalize_seconds = insert_seconds = 0.0
+    chunk = []
+    # Events are streamed in chunks so 10M-row runs never hold the whole corpus in memory
+    for raw in generator.generate(size, span_minutes=args.span_days * 24 * 60):
+        chunk.append(raw)
+        if len(chunk) >= CHUNK_SIZE:
+            normalized, seconds = _timed(lambda c: [normalizer.normalize("windows", r) for r in c], chunk)
+            normalize_seconds += seconds
+            insert_seconds += _timed(db.insert_logs, normalized)[1]
+            chunk = []
+    if chunk:
+        normalized, seconds = _timed(lambda c: [normalizer.normalize("windows", r) for r in c], chunk)
+        normalize_seconds += seconds
+        insert_seconds += _timed(db.insert_logs, normalized)[1]
+
+    results = {
+        "normalize": _entry(normalize_seconds, size),
+        "insert_logs": _entry(insert_seconds, size),
+    }
+
+    last_day = datetime.now().strftime("%Y-%m-%d")
+    (logs, _), seconds = _timed(db.query_logs, ["Security"], last_day, last_day, None)
+    results["query_logs_day"] = _entry(seconds, len(logs))
+    (logs, _), seconds = _timed(db.query_logs, ["Security"], last_day, last_day, None)
+    results["query_logs_day_cached"] = _entry(seconds, len(logs))
+    (logs, _), seconds = _timed(db.query_logs, None, None, None, "locked out")
+    results["query_logs_keyword"] = _entry(seconds, len(logs))
+    del logs
+
+    rule_engine = RuleEngine(rules_filepath=RULES_PATH, db_handler=db)
+    alerts, seconds = _timed(rule_engine.check_alerts)
+    results["check_alerts"] = _entry(seconds)
+    results["check_alerts"]["alerts"] = len(alerts)
+
+    correlation_engine = CorrelationEngine(rules_filepath=RULES_PATH, db_handler=db)
+    alerts, seconds = _timed(correlation_engine.check_correlations)
+    results["check_correlations"] = _entry(seconds)
+    results["check_correlations"]["alerts"] = len(alerts)
+
+    db.close()
+    return results
+
+def _legacy_normalize(normalizer, log):
+    """The pre-LogRecord representation: a normalized dict that embeds the raw event."""
+    event_type = normalizer.EVENT_TYPE_MAP.get(str(log.get("EventType")), "Unknown")
+    message = log.get("Message", "")
+    return {
+        "timestamp": log["TimeGenerated"].strftime("%Y-%m-%d %H:%M:%S"),
+        "logfile": log.get("logfile", "Unknown"),
+        "source": log.get("SourceName", "Unknown"),
+        "event_id": str(log.get("EventID", "")),
+        "event_type": event_type,
+        "severity": normalizer._determine_severity(message, event_type),
+        "message": message,
+        "raw_log": log
+    }
+
+MEMORY_SAMPLE = 100_000
+
+def _retained_bytes_per_record(build):
+    """Retained bytes per record, traced over a sample (tracemalloc is too slow for 10M rows)."""
+    tracemalloc.start()
+    records = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(retained / max(len(records), 1), 1)
+
+def bench_records(size, args, workdir):
+    """Compares bytes per record and records/sec of LogRecord against the legacy dicts."""
+    normalizer = LogNormalizer()
+    span = args.span_days * 24 * 60
+
+    def stream():
+        return SyntheticEventGenerator(seed=args.seed).generate(size, span_minutes=span)
+
+    # Throughput is measured over a pre-generated pool so event generation is not timed
+    pool = list(islice(stream(), min(size, CHUNK_SIZE)))
+    results = {}
+    for name, build_one in (("dict", lambda r: _legacy_normalize(normalizer, r)),
+                            ("record", lambda r: normalizer.normalize("windows", r))):
+        start = time.perf_counter()
+        for offset in range(0, size, len(pool)):
+            for raw in pool[:min(len(pool), size - offset)]:
+                build_one(raw)
+        seconds = time.perf_counter() - start
+        results[f"normalize_{name}"] = _entry(seconds, size)
+        results[f"normalize_{name}"]["bytes_per_record"] = _retained_bytes_per_record(
+            lambda: [build_one(raw) for raw in islice(stream(), MEMORY_SAMPLE)])
+
+    # Reading back from SQLite: dict(row) per row vs. interned LogRecords
+    db = DatabaseHandler(db_path=os.path.join(workdir, "records.db"), archive_path=os.path.join(workdir, "archive"))
+    batch = []
+    for raw in stream():
+        batch.append(normalizer.normalize("windows", raw))
+        if len(batch) >= CHUNK_SIZE:
+            db.insert_logs(batch)
+            batch = []
+    db.insert_logs(batch)
+
+    # Both queries read the newest IN_MEMORY_ROWS logs, as large a result set as the UI would hold
+    start_time = _recent_start(db, IN_MEMORY_ROWS) or 0
+    rows = db.conn.execute("SELECT COUNT(*) FROM logs WHERE timestamp >= ?", (start_time,)).fetchone()[0]
+
+    def legacy_query():
+        return [dict(row) for row in db.conn.execute("SELECT * FROM logs WHERE timestamp >= ? ORDER BY timestamp DESC", (start_time,))]
+
+    sample_day = datetime.now().strftime("%Y-%m-%d")
+    for name, query, sample in (
+        ("dict", legacy_query,
+         lambda: [dict(row) for row in db.conn.execute("SELECT * FROM logs WHERE timestamp >= ? LIMIT ?", (date_to_epoch(sample_day), MEMORY_SAMPLE))]),
+        ("record", lambda: db.query_logs(start_time=start_time)[0],
+         lambda: db.query_logs(start_date=sample_day)[0][:MEMORY_SAMPLE])
+    ):
+        _, seconds = _timed(query)
+        results[f"query_{name}"] = _entry(seconds, rows)
+        results[f"query_{name}"]["sample_rows"] = rows
+        results[f"query_{name}"]["bytes_per_record"] = _retained_bytes_per_record(sample)
+    db.close()
+    return results
+
+def _page_bytes(conn):
+    return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+def bench_timestamps(size, args, workdir):
+    """Range scans, sorts and index size with the legacy TEXT timestamps vs. integer epochs."""
+    normalizer = LogNormalizer()
+    now = now_epoch()
+    day_range = (now - 86400, now)
+    results = {}
+    for name, column_type, convert in (("text", "TEXT", format_epoch), ("epoch", "INTEGER", int)):
+        conn = sqlite3.connect(os.path.join(workdir, f"timestamps_{name}.db"))
+        conn.execute(DatabaseHandler.LOGS_TABLE_SQL.format(name="logs").replace("timestamp INTEGER", f"timestamp {column_type}"))
+        batch = []
+        for raw in SyntheticEventGenerator(seed=args.seed).generate(size, span_minutes=args.span_days * 24 * 60):
+            row = normalizer.normalize("windows", raw).as_row()
+            batch.append((convert(row[0]),) + row[1:])
+            if len(batch) >= CHUNK_SIZE:
+                conn.executemany("INSERT OR IGNORE INTO logs (timestamp, logfile, source, event_id, event_type, severity, message) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                batch = []
+        conn.executemany("INSERT OR IGNORE INTO logs (timestamp, logfile, source, event_id, event_type, severity, message) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+        conn.commit()
+
+        pages_before = _page_bytes(conn)
+        _, seconds = _timed(conn.execute, "CREATE INDEX idx_timestamp ON logs (timestamp)")
+        conn.commit()
+        results[f"index_build_{name}"] = _entry(seconds)
+        results[f"index_build_{name}"]["index_bytes"] = _page_bytes(conn) - pages_before
+
+        low, high = convert(day_range[0]), convert(day_range[1])
+        rows, seconds = _timed(lambda: conn.execute(
+            "SELECT id, timestamp FROM logs WHERE timestamp >= ? AND timestamp < ?", (low, high)).fetchall())
+        results[f"range_scan_{name}"] = _entry(seconds, len(rows))
+
+        window_low = convert(now - 300)
+        _, seconds = _timed(lambda: [conn.execute(
+            "SELECT COUNT(*) FROM logs WHERE logfile = 'Security' AND event_id = '4625' AND timestamp >= ?", (window_low,)).fetchone()
+            for _ in range(100)])
+        results[f"rule_window_x100_{name}"] = _entry(seconds)
+
+        rows, seconds = _timed(lambda: conn.execute("SELECT id, timestamp FROM logs ORDER BY timestamp DESC").fetchall())
+        results[f"sort_{name}"] = _entry(seconds, len(rows))
+        conn.close()
+    return results
+
+def bench_dedup(size, args, workdir):
+    """Re-offers an already stored day of logs, as an overlapping sync does, with and without the dedup filter."""
+    db = DatabaseHandler(db_path=os.path.join(workdir, "dedup.db"), archive_path=os.path.join(workdir, "archive"))
+    end_time = datetime.now().replace(microsecond=0)
+
+    def insert_all():
+        # Regenerated per pass (same seed and end time, so the same events); only the inserts are timed.
+        # One day keeps the whole corpus inside the filter's horizon
+        return sum(_timed(db.insert_logs, chunk)[1] for chunk in _normalized_chunks(size, args, 24 * 60, end_time=end_time))
+    results = {"first_insert": _entry(insert_all(), size)}
+
+    recent_keys = db.recent_keys
+    db.recent_keys = None
+    results["reinsert_sqlite_only"] = _entry(insert_all(), size)
+
+    db.recent_keys = recent_keys
+    offered, dropped = recent_keys.offered, recent_keys.dropped
+    results["reinsert_filtered"] = _entry(insert_all(), size)
+    results["reinsert_filtered"]["duplicate_rate"] = round((recent_keys.dropped - dropped) / (recent_keys.offered - offered), 4)
+    db.close()
+    return results
+
+def _loaded_db(size, args, workdir, name):
+    """A DatabaseHandler at `<workdir>/<name>.db` bulk-loaded with `size` synthetic events."""
+    db = DatabaseHandler(db_path=os.path.join(workdir, f"{name}.db"), archive_path=os.path.join(workdir, "archive"), retention_days=None)
+    db.bulk_insert_logs(_normalized_chunks(size, args))
+    return db
+
+def _recent_start(db, rows):
+    """Start time that selects about the newest `rows` logs (None when the table has fewer)."""
+    row = db.conn.execute("SELECT timestamp FROM logs ORDER BY timestamp DESC LIMIT 1 OFFSET ?", (rows - 1,)).fetchone()
+    return row[0] if row else None
+
+def bench_backtest(size, args, workdir):
+    """Backtests rules.json over the whole corpus: one sweep per rule vs. one query per window step."""
+    db = _loaded_db(size, args, workdir, "backtest")
+    first, last = db.conn.execute("SELECT MIN(timestamp), MAX(timestamp) FROM logs").fetchone()
+    results = {}
+    backtester = Backtester(db, rules_filepath=RULES_PATH)
+    alerts, seconds = _timed(backtester.run, first, last)
+    results["sweep"] = _entry(seconds, size)
+    results["sweep"]["alerts"] = len(alerts)
+
+    # The old way: every simple rule re-counted at each 1-minute step, capped to keep large runs bounded
+    rule_engine = RuleEngine(rules_filepath=RULES_PATH, db_handler=db)
+    steps = min((last - first) // 60 + 1, 2_000)
+    _, seconds = _timed(lambda: [rule_engine.check_alerts(end_time=first + step * 60) for step in range(steps)])
+    results["per_window_queries"] = _entry(seconds * ((last - first) // 60 + 1) / steps)
+    results["per_window_queries"]["extrapolated_from_steps"] = steps
+    db.close()
+    return results
+
+def bench_anomaly(size, args, workdir):
+    """Builds hour-of-week anomaly baselines over the whole corpus, then scores the latest hour."""
+    db = _loaded_db(size, args, workdir, "anomaly")
+    detector = AnomalyDetector(db)
+    results = {}
+    _, seconds = _timed(detector.recompute, days=args.span_days)
+    results["recompute_baselines"] = _entry(seconds, size)
+    alerts, seconds = _timed(detector.check_anomalies)
+    results["check_anomalies"] = _entry(seconds)
+    results["check_anomalies"]["alerts"] = len(alerts)
+    db.close()
+    return results
+
+def bench_histogram(size, args, workdir):
+    """Builds the event graph's minute/hour/day pyramid, then answers zooms from a minute to the whole span."""
+    db = _loaded_db(size, args, workdir, "histogram")
+    histogram = TimeHistogram(db)
+    results = {}
+    _, seconds = _timed(histogram.rebuild)
+    results["rebuild"] = _entry(seconds, size)
+    first, last = histogram.bounds()
+    spans = [60, 3600, 86400, last - first]
+    _, seconds = _timed(lambda: [histogram.bins(last - span, last) for span in spans for _ in range(250)])
+    results["zoom_x1000"] = _entry(seconds)
+    db.close()
+    return results
+
+def bench_facets(size, args, workdir):
+    """Builds the Summary tab's facet index over a full result set (up to IN_MEMORY_ROWS), then refreshes live counts per click."""
+    db = _loaded_db(size, args, workdir, "facets")
+    logs, _ = db.query_logs(start_time=_recent_start(db, IN_MEMORY_ROWS))
+    results = {}
+    index, seconds = _timed(FacetIndex, logs)
+    results["build_index"] = _entry(seconds, len(logs))
+    # A typical drill-down: two event IDs, then narrowed to one severity
+    selections = [{}, {"event_id": {"4625", "4624"}}, {"event_id": {"4625", "4624"}, "severity": {"Warning"}}]
+    _, seconds = _timed(lambda: [(index.mask(selected), index.facet_counts(selected)) for selected in selections])
+    results["refresh_x3"] = _entry(seconds, len(logs) * len(selections))
+    results["build_index"]["sample_rows"] = len(logs)
+    db.close()
+    return results
+
+def bench_incidents(size, args, workdir):
+    """Creates incidents with linked evidence (one per 100 events, up to 2000), then pages the incident list and opens evidence."""
+    db = _loaded_db(size, args, workdir, "incidents")
+    first, last = db.conn.execute("SELECT MIN(timestamp), MAX(timestamp) FROM logs").fetchone()
+    incident_count = min(max(size // 100, 100), 2000) # Each create commits on its own, as in the UI
+    step = max((last - first) // incident_count, 1)
+    results = {}
+
+    def create_all():
+        for i in range(incident_count):
+            end = first + (i + 1) * step
+            log_ids = db.rule_log_ids("Security", {"event_id": "4625"}, end - 600, end, limit=50)
+            db.create_incident({"rule_name": "Brute Force", "trigger_time": format_epoch(end), "log_ids": log_ids})
+            if i % 3:
+                db.update_incident_status(db.conn.execute("SELECT MAX(id) FROM incidents").fetchone()[0], "Closed")
+    _, seconds = _timed(create_all)
+    results["create_with_evidence"] = _entry(seconds, incident_count)
+    incidents, seconds = _timed(db.get_all_incidents)
+    results["list_all"] = _entry(seconds, len(incidents))
+    pages, seconds = _timed(lambda: [db.get_incidents("Open", 25, page * 25) for page in range(10)] + [db.count_incidents("Open")])
+    results["page_open_x10"] = _entry(seconds, sum(len(page) for page in pages[:-1]))
+    sample = [incident["id"] for incident in incidents[:100]]
+    evidence, seconds = _timed(lambda: [db.get_incident_evidence(incident_id) for incident_id in sample])
+    results["evidence_x100"] = _entry(seconds, sum(len(logs) for logs in evidence))
+    db.close()
+    return results
+
+def bench_auth(size, args, workdir):
+    """
+    Cost of one login check at the default bcrypt cost, and of attempts refused by
+    the lockout. UI responsiveness is covered by tests/test_login_window.py. `size` is unused.
+    """
+    from modules.user_auth import UserAuthenticator # bcrypt is only needed by this case
+    auth = UserAuthenticator(user_file=os.path.join(workdir, "users.json"), rounds=12)
+    auth.create_user("admin", "correct horse")
+    _, hash_seconds = _timed(auth.check_password, "admin", "correct horse")
+    results = {"check_password": _entry(hash_seconds, 1)}
+
+    for _ in range(auth.max_attempts):
+        auth.check_password("admin", "wrong")
+    _, seconds = _timed(lambda: [auth.check_password("admin", "wrong") for _ in range(1000)])
+    results["locked_out_x1000"] = _entry(seconds, 1000)
+    return results
+
+def bench_burst(size, args, workdir):
+    """
+    A reader bursting `size` events (up to IN_MEMORY_ROWS, generated up front)
+    at the ingest pipeline while the alert engines are slow, once per
+    backpressure policy: how long the reader is stalled, what is spilled or
+    dropped, and how long until everything is stored.
+    """
+    rows = min(size, IN_MEMORY_ROWS)
+    batches = list(_normalized_chunks(rows, args, 60, chunk_rows=1_000))
+    results = {}
+    for policy in IngestPipeline.POLICIES:
+        db = DatabaseHandler(db_path=os.path.join(workdir, f"burst_{policy}.db"), archive_path=os.path.join(workdir, "archive"), retention_days=None)
+        # A rule pass that takes 50 ms, far slower than the reader
+        pipeline = IngestPipeline(db, lambda logs, counts: time.sleep(0.05), policy=policy, max_batches=8,
+                                  spool_dir=os.path.join(workdir, f"spool_{policy}"))
+        before = metrics.snapshot()["counters"]
+        pipeline.start()
+        _, read_seconds = _timed(lambda: [pipeline.submit(batch) for batch in batches])
+        start = time.perf_counter()
+        pipeline.wait_until_idle()
+        pipeline.stop()
+        drain_seconds = time.perf_counter() - start
+        after = metrics.snapshot()["counters"]
+        results[f"reader_{policy}"] = _entry(read_seconds, rows)
+        results[f"reader_{policy}"]["sample_rows"] = rows
+        results[f"drain_{policy}"] = _entry(drain_seconds)
+        for counter in ("rows_spilled", "rows_dropped"):
+            results[f"drain_{policy}"][counter] = after.get(counter, 0) - before.get(counter, 0)
+        results[f"drain_{policy}"]["rows_stored"] = db.count_logs()
+        db.close()
+    return results
+
+def _paced_submit(pipeline, batches, rate):
+    """Submits `batches` at `rate` events/sec; returns the time spent inside submit()."""
+    spent, start, sent = 0.0, time.perf_counter(), 0
+    for batch in batches:
+        delay = start + sent / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        spent += _timed(pipeline.submit, batch, None, {"Security": sent})[1]
+        sent += len(batch)
+    pipeline.wait_until_idle(timeout=60)
+    return spent, time.perf_counter() - start
+
+def bench_journal(size, args, workdir):
+    """
+    Overhead of journaling every batch before SQLite at a sustained 10k events/sec
+    (paced for up to 5 seconds, 1,000-event batches), plus raw append throughput and
+    crash replay of `size` events.
+    """
+    rate = 10_000
+    paced = list(islice(_normalized_chunks(size, args, chunk_rows=1000), 5 * rate // 1000))
+    paced_rows = sum(len(batch) for batch in paced)
+    results = {}
+    for name, journal_dir in (("paced_without_journal", None), ("paced_with_journal", "journal_paced")):
+        db = DatabaseHandler(db_path=os.path.join(workdir, f"{name}.db"), archive_path=os.path.join(workdir, "archive"), retention_days=None)
+        journal = IngestJournal(os.path.join(workdir, journal_dir)) if journal_dir else None
+        pipeline = IngestPipeline(db, lambda logs, counts: None, spool_dir=os.path.join(workdir, "spool"), journal=journal)
+        pipeline.start()
+        spent, wall = _paced_submit(pipeline, paced, rate)
+        pipeline.stop()
+        results[name] = _entry(spent, paced_rows)
+        results[name]["load"] = round(spent / wall, 4) # Share of the reader thread spent handing batches over
+        db.close()
+
+    # A session that journals everything and then crashes before committing any of it
+    journal_dir = os.path.join(workdir, "journal_crash")
+    def append_all(journal):
+        # Streamed a chunk at a time; only the appends (1,000-event batches) and the final sync are timed
+        seconds = 0.0
+        for chunk in _normalized_chunks(size, args):
+            seconds += sum(_timed(journal.append, chunk[i:i + 1000])[1] for i in range(0, len(chunk), 1000))
+        return seconds + _timed(journal.sync)[1]
+    journal = IngestJournal(journal_dir)
+    seconds = append_all(journal)
+    results["append"] = _entry(seconds, size)
+    del journal # Never closed, like a killed process
+    db = DatabaseHandler(db_path=os.path.join(workdir, "replay.db"), archive_path=os.path.join(workdir, "archive"), retention_days=None)
+    def recover():
+        recovered = IngestJournal(journal_dir)
+        pipeline = IngestPipeline(db, lambda logs, counts: None, spool_dir=os.path.join(workdir, "spool"), journal=recovered)
+        pipeline._replay_journal()
+        recovered.close()
+    _, seconds = _timed(recover)
+    results["replay"] = _entry(seconds, db.conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0])
+    db.close()
+    return results
+
+# Each case takes (size, args, workdir) and returns {metric_name: {"seconds": ..., ...}}
+CASES = {
+    "pipeline": bench_pipeline,
+    "records": bench_records,
+    "timestamps": bench_timestamps,
+    "dedup": bench_dedup,
+    "backtest": bench_backtest,
+    "anomaly": bench_anomaly,
+    "histogram": bench_histogram,
+    "facets": bench_facets,
+    "incidents": bench_incidents,
+    "auth": bench_auth,
+    "journal": bench_journal,
+    "burst": bench_burst,
+}
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Returns a list of (key, baseline_seconds, current_seconds) that got slower than `tolerance` allows."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous or not previous.get("seconds") or "seconds" not in current:
+            continue
+        if current["seconds"] > previous["seconds"] * (1 + tolerance):
+            regressions.append((key, previous["seconds"], current["seconds"]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="SecLog end-to-end benchmark suite.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000],
+                        help="Corpus sizes to run (e.g. 10000 1000000 10000000).")
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=1, help="Run each case N times and keep the fastest result.")
+    parser.add_argument("--span-days", type=int, default=7, help="Time span the synthetic corpus covers.")
+    parser.add_argument("--output", help="Result file (defaults to data/benchmarks/results_<timestamp>.json).")
+    parser.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown before flagging (0.15 = 15%%).")
+    args = parser.parse_args()
+
+    results = {}
+    for case in args.cases:
+        for size in args.sizes:
+            print(f"--- Running '{case}' with {size:,} events ---")
+            for _ in range(max(args.repeat, 1)):
+                workdir = tempfile.mkdtemp(prefix="seclog_bench_")
+                try:
+                    for metric, entry in CASES[case](size, args, workdir).items():
+                        key = f"{case}.{metric}@{size}"
+                        if key not in results or entry["seconds"] < results[key]["seconds"]:
+                            results[key] = entry
+                finally:
+                    shutil.rmtree(workdir, ignore_errors=True)
+            for key, entry in results.items():
+                if key.startswith(f"{case}.") and key.endswith(f"@{size}"):
+                    metric = key[len(case) + 1:key.rindex("@")]
+                    extra = f"  {entry['bytes_per_record']} B/record" if "bytes_per_record" in entry else ""
+                    extra += f"  index {entry['index_bytes'] / 1e6:.1f} MB" if "index_bytes" in entry else ""
+                    extra += f"  {entry['duplicate_rate']:.1%} duplicates" if "duplicate_rate" in entry else ""
+                    extra += f"  {entry['load']:.2%} of reader time" if "load" in entry else ""
+                    extra += f"  sample of {entry['sample_rows']:,}" if "sample_rows" in entry and entry["sample_rows"] < size else ""
+                    extra += "".join(f"  {name[5:]} {entry[name]:,}" for name in ("rows_spilled", "rows_dropped", "rows_stored") if name in entry)
+                    print(f"  {metric:<24} {entry['seconds']:>10.4f}s  {entry.get('rows_per_sec') or '':>12}{extra}")
+
+    report = {
+        "meta": {
+            "run_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"results_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.save_baseline:
+        shutil.copyfile(output, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f).get("results", {})
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for key, before, after in regressions:
+            print(f"REGRESSION {key}: {before:.4f}s -> {after:.4f}s ({(after / before - 1) * 100:+.1f}%)")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
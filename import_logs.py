@@ -0,0 +1,73 @@
+# import_logs.py
+
+import argparse
+import glob
+import os
+from modules.database_handler import DatabaseHandler
+from modules.bulk_importer import BulkImporter
+from modules.backtester import Backtester
+from modules.time_utils import format_epoch
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+
+def main():
+    """Bulk-imports offline evidence (archives, JSON/JSONL exports, EVTX files) into SecLog."""
+    parser = argparse.ArgumentParser(description="Bulk-import historical logs into the SecLog database.")
+    parser.add_argument("paths", nargs="*", help="Files or glob patterns (*.csv.gz, *.csv, *.jsonl, *.json, *.evtx).")
+    parser.add_argument("--db", default="data/seclog.db", help="Database to load into.")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--run-rules", action="store_true", help="Re-run the alert rules over the imported time range.")
+    parser.add_argument("--rules-file", default=RULES_PATH)
+    parser.add_argument("--no-hold", action="store_true",
+                        help="Let the app's retention archive imported logs older than its window (they are kept by default).")
+    parser.add_argument("--release-holds", action="store_true",
+                        help="Release the retention holds of earlier imports, so their logs age out normally.")
+    args = parser.parse_args()
+    if not args.paths and not args.release_holds:
+        parser.error("give files to import, or --release-holds")
+
+    # Windows shells do not expand wildcards, so patterns are expanded here
+    paths = []
+    for pattern in args.paths:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches if matches else [pattern])
+    paths = [p for p in paths if os.path.isfile(p)] or paths
+
+    # Retention is skipped so the import itself never archives what it just loaded
+    db_handler = DatabaseHandler(db_path=args.db, retention_days=None)
+    if args.release_holds:
+        print(f"Released {db_handler.release_retention_holds()} retention hold(s); those logs are archived at the next app start if old enough.")
+        if not args.paths:
+            db_handler.close()
+            return
+    importer = BulkImporter(db_handler, batch_size=args.batch_size)
+
+    print(f"--- Importing {len(paths)} file(s) into {args.db} ---")
+    summary = importer.import_files(
+        paths, progress_callback=lambda s: print(f"  ...{s['read']:,} records read", end="\r"))
+    print(f"\nRead {summary['read']:,} records from {summary['files']} file(s) in {summary['seconds']}s "
+          f"({summary['rows_per_sec']:,} rows/sec).")
+    print(f"Inserted {summary['inserted']:,} new logs, skipped {summary['duplicates']:,} duplicates, "
+          f"{summary['failed']:,} records failed normalization.")
+    if summary["failed_files"]:
+        print(f"Could not read: {', '.join(summary['failed_files'])}")
+    if summary["first"]:
+        print(f"Imported time range: {format_epoch(summary['first'])} -> {format_epoch(summary['last'])}")
+        if args.no_hold:
+            print("Note: logs older than the 30-day retention window are archived the next time the app starts.")
+        else:
+            # Persisted in the database, so the app's retention keeps this range until --release-holds
+            db_handler.add_retention_hold(summary["first"], summary["last"], f"import of {summary['files']} file(s)")
+            print("This range is held from retention; release it with --release-holds.")
+
+    if args.run_rules and summary["first"]:
+        print("--- Running rules over the imported range ---")
+        alerts = Backtester(db_handler, rules_filepath=args.rules_file).run(summary["first"], summary["last"])
+        for alert in alerts:
+            print(f"🚨 [{alert['trigger_time']} -> {alert['end_time']}] {alert['rule_name']} (peak count: {alert['count']})")
+        print(f"{len(alerts)} alert(s) would have fired.")
+
+    db_handler.close()
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,14 @@
 
 import threading
 import time
-import csv
 from datetime import datetime
-from tkinter import filedialog, messagebox
+from tkinter import messagebox
 from collections import Counter
 import win32evtlog
 import win32evtlogutil
 import pywintypes
 from modules.log_normalizer import LogNormalizer
+from modules.metrics import metrics
 
 class LogHandler:
     def __init__(self):
@@ -23,29 +23,27 @@ class LogHandler:
         start_dt = datetime.strptime(start_date_str, "%Y-%m-%d") if start_date_str else None
         end_dt = datetime.strptime(end_date_str, "%Y-%m-%d") if end_date_str else None
         try:
-            for log_file in log_types:
-                log_handle = win32evtlog.OpenEventLog(None, log_file)
-                flags = win32evtlog.EVENTLOG_BACKWARDS_READ | win32evtlog.EVENTLOG_SEQUENTIAL_READ
-                events = True
-                while events:
-                    events = win32evtlog.ReadEventLog(log_handle, flags, 0)
-                    if not events: break
-                    for ev_obj in events:
-                        time_generated = ev_obj.TimeGenerated
-                        if start_dt and time_generated < start_dt: continue
-                        if end_dt and time_generated > end_dt: continue
-                        message = win32evtlogutil.SafeFormatMessage(ev_obj, log_file)
-                        if keyword and keyword.lower() not in message.lower(): continue
-                        record = {
-                            "TimeGenerated": time_generated, "SourceName": ev_obj.SourceName,
-                            "EventID": ev_obj.EventID & 0xFFFF, "EventType": ev_obj.EventType,
-                            "Message": message, "logfile": log_file
-                        }
-                        normalized_record = self.normalizer.normalize("windows", record)
-                        all_logs.append(normalized_record)
-                counts[log_file] = len(all_logs)
-                win32evtlog.CloseEventLog(log_handle)
-            all_logs.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+            with metrics.stage("fetch"):
+                for log_file in log_types:
+                    log_handle = win32evtlog.OpenEventLog(None, log_file)
+                    flags = win32evtlog.EVENTLOG_BACKWARDS_READ | win32evtlog.EVENTLOG_SEQUENTIAL_READ
+                    events = True
+                    while events:
+                        read_start = time.perf_counter()
+                        events = win32evtlog.ReadEventLog(log_handle, flags, 0)
+                        metrics.observe("read", time.perf_counter() - read_start)
+                        if not events: break
+                        metrics.incr("rows_read", len(events))
+                        for ev_obj in events:
+                            time_generated = ev_obj.TimeGenerated
+                            if start_dt and time_generated < start_dt: continue
+                            if end_dt and time_generated > end_dt: continue
+                            normalized_record = self._format_and_normalize(ev_obj, log_file, keyword)
+                            if normalized_record is not None:
+                                all_logs.append(normalized_record)
+                    counts[log_file] = len(all_logs)
+                    win32evtlog.CloseEventLog(log_handle)
+                all_logs.sort(key=lambda x: x.get('timestamp') or 0, reverse=True)
             return all_logs, counts
         except pywintypes.error as e:
             if e.winerror == 5: messagebox.showerror("Permissions Error", f"Access denied to '{log_file}' log. Run as admin.")
@@ -55,21 +53,45 @@ class LogHandler:
             messagebox.showerror("Error", f"An unexpected error occurred: {e}")
             return [], Counter()
 
-    def start_monitoring(self, update_callback):
+    def _format_and_normalize(self, ev_obj, log_file, keyword=None):
+        """Formats and normalizes one raw event, recording both stage latencies."""
+        format_start = time.perf_counter()
+        message = win32evtlogutil.SafeFormatMessage(ev_obj, log_file)
+        normalize_start = time.perf_counter()
+        metrics.observe("format", normalize_start - format_start)
+        if keyword and keyword.lower() not in message.lower():
+            return None
+        record = {
+            "TimeGenerated": ev_obj.TimeGenerated, "SourceName": ev_obj.SourceName,
+            "EventID": ev_obj.EventID & 0xFFFF, "EventType": ev_obj.EventType,
+            "Message": message, "logfile": log_file
+        }
+        normalized_record = self.normalizer.normalize("windows", record)
+        metrics.observe("normalize", time.perf_counter() - normalize_start)
+        return normalized_record
+
+    def start_monitoring(self, update_callback, bookmarks=None):
+        """
+        Polls the event logs on a thread, handing new logs to
+        `update_callback(new_logs, counts, bookmarks)`. `bookmarks` ({log file:
+        record number}) resumes where a previous session stopped.
+        """
         if self.monitoring: return
         self.monitoring = True
-        self.monitor_thread = threading.Thread(target=self._monitor_loop, args=(update_callback,), daemon=True)
+        self.monitor_thread = threading.Thread(target=self._monitor_loop, args=(update_callback, bookmarks), daemon=True)
         self.monitor_thread.start()
 
     def stop_monitoring(self):
         self.monitoring = False
 
-    def _monitor_loop(self, update_callback):
-        last_record_numbers = {}
+    def _monitor_loop(self, update_callback, bookmarks=None):
+        last_record_numbers = dict(bookmarks or {})
+        reported_numbers = dict(last_record_numbers)
         log_files = ["Security", "System", "Application"]
         while self.monitoring:
             new_logs = []
             counts = Counter()
+            poll_start = time.perf_counter()
             for log_file in log_files:
                 log_handle = None
                 try:
@@ -81,6 +103,7 @@ class LogHandler:
                         start_from_num = last_seen_num
                         if start_from_num < oldest_record_num:
                             start_from_num = oldest_record_num
+                        read_start = time.perf_counter()
                         if start_from_num > 0:
                             flags = win32evtlog.EVENTLOG_FORWARDS_READ | win32evtlog.EVENTLOG_SEEK_READ
                             events = win32evtlog.ReadEventLog(log_handle, flags, start_from_num)
@@ -88,15 +111,10 @@ class LogHandler:
                         else:
                              flags = win32evtlog.EVENTLOG_FORWARDS_READ | win32evtlog.EVENTLOG_SEQUENTIAL_READ
                              events_to_process = win32evtlog.ReadEventLog(log_handle, flags, 0)
+                        metrics.observe("read", time.perf_counter() - read_start)
+                        metrics.incr("rows_read", len(events_to_process))
                         for ev_obj in events_to_process:
-                            message = win32evtlogutil.SafeFormatMessage(ev_obj, log_file)
-                            record = {
-                                "TimeGenerated": ev_obj.TimeGenerated, "SourceName": ev_obj.SourceName,
-                                "EventID": ev_obj.EventID & 0xFFFF, "EventType": ev_obj.EventType,
-                                "Message": message, "logfile": log_file
-                            }
-                            normalized_record = self.normalizer.normalize("windows", record)
-                            new_logs.append(normalized_record)
+                            new_logs.append(self._format_and_normalize(ev_obj, log_file))
                             counts[log_file] += 1
                     last_record_numbers[log_file] = total_records
                 except Exception as e:
@@ -104,25 +122,12 @@ class LogHandler:
                 finally:
                     if log_handle:
                         win32evtlog.CloseEventLog(log_handle)
-            if new_logs:
-                new_logs.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-                update_callback(new_logs, counts)
+            metrics.observe("monitor_poll", time.perf_counter() - poll_start)
+            metrics.set_gauge("monitor_batch_size", len(new_logs))
+            if new_logs or last_record_numbers != reported_numbers:
+                new_logs.sort(key=lambda x: x.get('timestamp') or 0, reverse=True)
+                # Normally IngestPipeline.submit: journals and queues the batch and returns, so the next
+                # poll isn't delayed. The bookmarks travel with the batch, so they never get ahead of it.
+                reported_numbers = dict(last_record_numbers)
+                update_callback(new_logs, counts, reported_numbers)
             time.sleep(3)
-
-    def save_logs_to_csv(self, logs_to_save):
-        if not logs_to_save:
-            messagebox.showinfo("Export", "No logs to export.")
-            return
-        filepath = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")], title="Save Logs As...")
-        if not filepath: return
-        headers = ["timestamp", "logfile", "source", "event_id", "event_type", "severity", "message"]
-        try:
-            with open(filepath, "w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=headers)
-                writer.writeheader()
-                for log in logs_to_save:
-                    filtered_log = {k: log.get(k, '') for k in headers}
-                    writer.writerow(filtered_log)
-            messagebox.showinfo("Export Successful", f"Successfully saved {len(logs_to_save)} logs to {filepath}")
-        except Exception as e:
-            messagebox.showerror("Export Error", f"Failed to save logs to CSV.\nError: {e}")
\ No newline at end of file
@@ -2,15 +2,27 @@
 
 import customtkinter as ctk
 import tkinter as tk
+from tkinter import filedialog, messagebox
 import threading
+import os
 
 from log_handler import LogHandler
 from modules.database_handler import DatabaseHandler
 from modules.rule_engine import RuleEngine
 from modules.alert_manager import AlertManager
 from modules.correlation_engine import CorrelationEngine
+from modules.anomaly_detector import AnomalyDetector
+from modules.time_histogram import TimeHistogram
+from modules.facet_index import FacetIndex
+from modules.ingest_pipeline import IngestPipeline
+from modules.ingest_journal import IngestJournal
+from modules.log_exporter import LogExporter
+from modules.metrics import metrics
+from modules.time_utils import date_to_epoch, now_epoch
 import ui_components
 
+INCIDENTS_PER_PAGE = 25
+
 class SecurityLogApp(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -24,9 +36,35 @@ class SecurityLogApp(ctk.CTk):
         self.rule_engine = RuleEngine(db_handler=self.db_handler)
         self.alert_manager = AlertManager()
         self.correlation_engine = CorrelationEngine(db_handler=self.db_handler)
+        self.anomaly_detector = AnomalyDetector(self.db_handler)
+        # Baselines take a few seconds on a full database; anomalies are simply not scored until ready
+        threading.Thread(target=self.anomaly_detector.recompute, daemon=True).start()
+        self.log_exporter = LogExporter(self.db_handler)
+        self.time_histogram = TimeHistogram(self.db_handler)
+        self.graph_range = None # (start, end) epoch after a drill-down; None follows the sidebar filters
+        self.export_cancel_event = None
+        # Monitor -> queue -> DB writer -> alert engines; SECLOG_BACKPRESSURE picks block, spill or drop
+        # Every batch is journaled before it is queued, so a crash or close mid-session loses nothing
+        self.ingest_pipeline = IngestPipeline(self.db_handler, self._real_time_update_callback,
+                                              policy=os.environ.get("SECLOG_BACKPRESSURE", "spill"),
+                                              journal=IngestJournal("data/journal"))
+        self.ingest_pipeline.start() # Also replays anything journaled or spooled by a previous session
+        self.closing = False # Set once the window is closing; the detector stops posting to Tk
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+        # Pipeline instrumentation: periodic JSON dump, optional cProfile of hot stages
+        # (e.g. SECLOG_PROFILE="insert,rule_eval,correlation")
+        if os.environ.get("SECLOG_PROFILE"):
+            metrics.enable_profiling(os.environ["SECLOG_PROFILE"])
+        metrics.start_periodic_dump("data/metrics/metrics.json", interval_seconds=30)
 
         self.filtered_logs = []
+        self.query_results = [] # The last query's logs before facet selections
+        self.facet_index = FacetIndex()
+        self.facet_selections = {} # facet -> set of selected values
         self.incidents = []
+        self.incident_page = 0
+        self.incident_status = "All"
         self.grid_columnconfigure(1, weight=1)
         self.grid_rowconfigure(0, weight=1)
         ui_components.create_sidebar(self, self)
@@ -38,83 +76,215 @@ class SecurityLogApp(ctk.CTk):
         latest_logs, _ = self.log_handler.fetch_logs(log_sources, None, None, None)
         self.db_handler.insert_logs(latest_logs)
         print("Querying database...")
-        queried_logs, counts = self.db_handler.query_logs(log_sources, start_date, end_date, keyword)
+        queried_logs, _ = self.db_handler.query_logs(log_sources, start_date, end_date, keyword)
+        self.time_histogram.rebuild(log_sources, keyword)
+        self.graph_range = None
+        facet_index = self._build_facet_index(queried_logs)
         
         # --- Run both alert engines ---
-        new_alerts = self.rule_engine.check_alerts()
-        new_correlation_alerts = self.correlation_engine.check_correlations()
-        all_new_alerts = new_alerts + new_correlation_alerts
+        new_alerts, new_correlation_alerts, new_anomaly_alerts = self._run_alert_engines()
+        all_new_alerts = new_alerts + new_correlation_alerts + new_anomaly_alerts
         if all_new_alerts:
             self.alert_manager.process_new_alerts(all_new_alerts)
             print(f"🚨 Processed {len(all_new_alerts)} new alerts!")
         
-        self.after(0, self._update_ui, queried_logs, counts)
-
-    def _update_ui(self, logs, counts):
-        self.filtered_logs = logs
-        self.logs_label.configure(text=f"Logs Found: {len(self.filtered_logs)} entries")
-        ui_components.display_alerts(self, self.alert_manager.get_active_alerts())
-        ui_components.display_logs(self.log_textbox, self.filtered_logs)
-        ui_components.update_summary_cards(self, len(self.filtered_logs), counts)
-        ui_components.update_summary_tab(self, self.filtered_logs)
-        ui_components.draw_event_graph(self.graph_frame, self.filtered_logs)
-        self.refresh_incidents()
+        self.after(0, self._set_results, queried_logs, facet_index)
+
+    def _run_alert_engines(self):
+        """Runs the simple and correlation rule engines and the anomaly detector, timing each one."""
+        with metrics.stage("rule_eval"):
+            new_alerts = self.rule_engine.check_alerts()
+        with metrics.stage("correlation"):
+            new_correlation_alerts = self.correlation_engine.check_correlations()
+        with metrics.stage("anomaly"):
+            new_anomaly_alerts = self.anomaly_detector.check_anomalies()
+        metrics.incr("alerts_raised", len(new_alerts) + len(new_correlation_alerts) + len(new_anomaly_alerts))
+        return new_alerts, new_correlation_alerts, new_anomaly_alerts
+
+    @staticmethod
+    def _build_facet_index(logs):
+        # Runs on the query thread so the UI thread only ever does mask/bincount work
+        with metrics.stage("facet_index"):
+            return FacetIndex(logs)
+
+    def _set_results(self, logs, facet_index):
+        self.query_results = logs
+        self.facet_index = facet_index
+        self._apply_facets()
+
+    def _prepend_results(self, new_logs):
+        self.query_results = new_logs + self.query_results
+        self.facet_index.prepend(new_logs)
+        self._apply_facets()
+
+    def _apply_facets(self):
+        """Narrows the query results to the selected facet values and refreshes every view."""
+        with metrics.stage("facets"):
+            if any(self.facet_selections.values()):
+                mask = self.facet_index.mask(self.facet_selections)
+                logs = [self.query_results[i] for i in mask.nonzero()[0]]
+            else:
+                logs = self.query_results
+            facet_counts = self.facet_index.facet_counts(self.facet_selections)
+        self._update_ui(logs, dict(facet_counts["logfile"]), facet_counts)
+
+    def toggle_facet(self, facet, value):
+        selected = self.facet_selections.setdefault(facet, set())
+        if value in selected:
+            selected.discard(value)
+        else:
+            selected.add(value)
+        self._apply_facets()
+
+    def _update_ui(self, logs, counts, facet_counts):
+        with metrics.stage("ui_render"):
+            self.filtered_logs = logs
+            metrics.set_gauge("filtered_logs", len(self.filtered_logs))
+            self.logs_label.configure(text=f"Logs Found: {len(self.filtered_logs)} entries")
+            ui_components.display_alerts(self, self.alert_manager.get_active_alerts())
+            ui_components.display_logs(self.log_textbox, self.filtered_logs)
+            ui_components.update_summary_cards(self, len(self.filtered_logs), counts)
+            ui_components.update_summary_tab(self, facet_counts, self.facet_selections)
+            self.refresh_event_graph()
+
+    def refresh_event_graph(self):
+        """Redraws the graph for the drilled-down range, the sidebar dates or the last 24 hours of data."""
+        start = end = None
+        if self.graph_range is not None:
+            start, end = self.graph_range
+        else:
+            filters = self._current_filters()
+            try:
+                if filters["start_date"]: start = date_to_epoch(filters["start_date"])
+                if filters["end_date"]: end = date_to_epoch(filters["end_date"], days=1)
+            except ValueError:
+                pass # Malformed dates fall back to the default range
+            bounds = self.time_histogram.bounds()
+            if end is None: end = bounds[1] + 1 if bounds else now_epoch()
+            if start is None: start = end - 24 * 3600
+        ui_components.draw_event_graph(self, self.time_histogram.bins(start, end))
+
+    def drill_down_graph(self, start, end):
+        """Zooms the graph into [start, end) and shows only the logs in that range."""
+        self.graph_range = (start, end)
+        self.logs_label.configure(text="🔄 Loading range...")
+        filters = self._current_filters()
+        threading.Thread(target=self._range_query_thread, args=(filters["log_sources"], filters["keyword"], start, end), daemon=True).start()
+
+    def _range_query_thread(self, log_sources, keyword, start, end):
+        logs, _ = self.db_handler.query_logs(log_sources, keyword=keyword, start_time=start, end_time=end)
+        self.after(0, self._set_results, logs, self._build_facet_index(logs))
+
+    def reset_graph_zoom(self):
+        if self.graph_range is None: return
+        self.search_logs()
 
     # 🔹 UPDATED REAL-TIME CALLBACK with detailed logging 🔹
     def _real_time_update_callback(self, new_logs, counts):
         """
-        Callback for the monitor. Inserts new logs, checks all alert engines, and updates UI.
+        Detector stage of the ingest pipeline: called on its own thread once new
+        logs are in the database. Checks all alert engines and updates the UI.
         """
         if not new_logs:
             return
 
         print(f"\n[Real-Time] Received {len(new_logs)} new logs.")
-        self.db_handler.insert_logs(new_logs)
 
         print("[Real-Time] Running alert engines...")
-        new_simple_alerts = self.rule_engine.check_alerts()
-        new_correlation_alerts = self.correlation_engine.check_correlations()
+        new_simple_alerts, new_correlation_alerts, new_anomaly_alerts = self._run_alert_engines()
         
         print(f"[Real-Time] Found {len(new_simple_alerts)} simple alerts.")
         print(f"[Real-Time] Found {len(new_correlation_alerts)} correlation alerts.")
+        print(f"[Real-Time] Found {len(new_anomaly_alerts)} anomaly alerts.")
 
-        all_new_alerts = new_simple_alerts + new_correlation_alerts
+        all_new_alerts = new_simple_alerts + new_correlation_alerts + new_anomaly_alerts
         if all_new_alerts:
             self.alert_manager.process_new_alerts(all_new_alerts)
             print(f"🚨 [Real-Time] Processed {len(all_new_alerts)} new alerts!")
 
-        # Prepend new logs to the currently displayed logs for immediate feedback
-        self.filtered_logs = new_logs + self.filtered_logs
-        
-        # Schedule a full UI refresh
-        self.after(0, self._update_ui, self.filtered_logs, counts)
+        self.time_histogram.add(new_logs)
+        if self.closing:
+            return # The drain in on_closing is running; the window is about to go
+        # Prepend new logs to the current results for immediate feedback, then refresh the UI
+        self.after(0, self._prepend_results, new_logs)
 
     # ... (rest of the file is unchanged) ...
     def create_incident_from_alert(self, alert):
         incident_id = self.db_handler.create_incident(alert)
         if incident_id:
             self.alert_manager.remove_alert(alert)
-            self._update_ui(self.filtered_logs, {})
+            self._apply_facets()
+            self.refresh_incidents()
+
+    def _current_filters(self):
+        """Reads the sidebar filters as DatabaseHandler.query_logs keyword arguments."""
+        return {
+            "log_sources": ["Security", "System", "Application"] if self.log_type.get() == "All" else [self.log_type.get()],
+            "start_date": self.start_date_entry.get().strip() or None,
+            "end_date": self.end_date_entry.get().strip() or None,
+            "keyword": self.filter_entry.get().strip() or None
+        }
+
+    def _export_filters(self):
+        """The filters behind the logs on screen: sidebar or graph drill-down, plus facet selections."""
+        filters = self._current_filters()
+        if self.graph_range is not None:
+            # A drill-down queries the graph range instead of the sidebar dates
+            filters["start_date"] = filters["end_date"] = None
+            filters["start_time"], filters["end_time"] = self.graph_range
+        filters["facets"] = {facet: sorted(values, key=str) for facet, values in self.facet_selections.items() if values}
+        return filters
+
+    def _invalid_date(self, filters):
+        """The first sidebar date that isn't YYYY-MM-DD, or None when both are usable."""
+        for field in ("start_date", "end_date"):
+            if filters[field]:
+                try:
+                    date_to_epoch(filters[field])
+                except ValueError:
+                    return filters[field]
+        return None
 
     def search_logs(self):
+        filters = self._current_filters()
+        invalid_date = self._invalid_date(filters)
+        if invalid_date is not None:
+            self.logs_label.configure(text=f"⚠️ Invalid date '{invalid_date}' (use YYYY-MM-DD)")
+            return
         self.logs_label.configure(text="🔄 Syncing & Searching...")
         threading.Thread(target=self._sync_and_query_thread, args=(
-            ["Security", "System", "Application"] if self.log_type.get() == "All" else [self.log_type.get()],
-            self.start_date_entry.get().strip() or None,
-            self.end_date_entry.get().strip() or None,
-            self.filter_entry.get().strip() or None
+            filters["log_sources"], filters["start_date"], filters["end_date"], filters["keyword"]
         ), daemon=True).start()
 
     def refresh_incidents(self):
-        self.incidents = self.db_handler.get_all_incidents()
+        """Reloads the current page of incidents; only one page is ever read or drawn."""
+        status = None if self.incident_status == "All" else self.incident_status
+        total = self.db_handler.count_incidents(status)
+        page_count = max(-(-total // INCIDENTS_PER_PAGE), 1)
+        self.incident_page = min(self.incident_page, page_count - 1)
+        self.incidents = self.db_handler.get_incidents(status, INCIDENTS_PER_PAGE, self.incident_page * INCIDENTS_PER_PAGE)
         ui_components.display_incidents(self, self.incidents)
+        ui_components.update_incident_pager(self, self.incident_page, page_count, total)
+
+    def change_incident_page(self, step):
+        self.incident_page = max(self.incident_page + step, 0)
+        self.refresh_incidents()
+
+    def filter_incidents(self, status):
+        self.incident_status = status
+        self.incident_page = 0
+        self.refresh_incidents()
+
+    def show_incident_evidence(self, incident):
+        ui_components.show_incident_evidence(self, incident, self.db_handler.get_incident_evidence(incident["id"]))
 
     def update_incident_status(self, incident_id, new_status):
         self.db_handler.update_incident_status(incident_id, new_status)
         self.refresh_incidents()
 
     def start_real_time_monitoring(self):
-        self.log_handler.start_monitoring(self._real_time_update_callback)
+        # Resumes from the last journaled bookmarks, so events logged while the app was closed are read too
+        self.log_handler.start_monitoring(self.ingest_pipeline.submit, self.ingest_pipeline.bookmarks())
         self.start_button.configure(state="disabled")
         self.stop_button.configure(state="normal")
 
@@ -122,12 +292,70 @@ class SecurityLogApp(ctk.CTk):
         self.log_handler.stop_monitoring()
         self.start_button.configure(state="normal")
         self.stop_button.configure(state="disabled")
+
+    def on_closing(self):
+        """Drains the ingest pipeline and closes the journal so the next start has nothing to replay."""
+        if self.closing:
+            return
+        self.closing = True
+        self.title("SecLog - Saving pending logs...")
+        self.log_handler.stop_monitoring()
+        # Drained off the Tk thread: joining the writer/detector here would block their after() calls
+        drain_thread = threading.Thread(target=self.ingest_pipeline.stop, daemon=True)
+        drain_thread.start()
+        self._finish_closing(drain_thread)
+
+    def _finish_closing(self, drain_thread):
+        if drain_thread.is_alive():
+            self.after(100, self._finish_closing, drain_thread)
+            return
+        metrics.stop_periodic_dump()
+        self.destroy()
         
     def save_filtered_logs(self):
-        self.log_handler.save_logs_to_csv(self.filtered_logs)
+        """Streams every log matching the current filters to disk on a background thread."""
+        if self.export_cancel_event is not None:
+            return # An export is already running
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("Gzipped CSV", "*.csv.gz"), ("JSON Lines", "*.jsonl"), ("All files", "*.*")],
+            title="Save Logs As..."
+        )
+        if not filepath: return
+        self.export_button.configure(text="💾 Exporting...", state="disabled")
+        self.cancel_export_button.configure(state="normal")
+        self.export_cancel_event = self.log_exporter.start_export(
+            filepath, self._export_filters(),
+            progress_callback=lambda done, total: self.after(0, self._update_export_progress, done, total),
+            done_callback=lambda rows, completed, error: self.after(0, self._export_finished, filepath, rows, completed, error)
+        )
+
+    def cancel_export(self):
+        if self.export_cancel_event is not None:
+            self.export_cancel_event.set()
+
+    def _update_export_progress(self, rows_written, total):
+        if total:
+            self.export_button.configure(text=f"💾 Exporting... {rows_written * 100 // total}%")
+        else:
+            self.export_button.configure(text=f"💾 Exporting... {rows_written:,} rows")
+
+    def _export_finished(self, filepath, rows_written, completed, error):
+        self.export_cancel_event = None
+        self.export_button.configure(text="💾 Export Logs", state="normal")
+        self.cancel_export_button.configure(state="disabled")
+        if error is not None:
+            messagebox.showerror("Export Error", f"Failed to export logs.\nError: {error}")
+        elif completed:
+            messagebox.showinfo("Export Successful", f"Successfully saved {rows_written} logs to {filepath}")
+        else:
+            messagebox.showinfo("Export Cancelled", "The export was cancelled; no file was written.")
 
     def reset_filters(self):
         self.start_date_entry.delete(0, tk.END)
         self.end_date_entry.delete(0, tk.END)
         self.filter_entry.delete(0, tk.END)
-        self.log_type.set("All")
\ No newline at end of file
+        self.log_type.set("All")
+        if any(self.facet_selections.values()):
+            self.facet_selections = {}
+            self._apply_facets()
\ No newline at end of file
@@ -0,0 +1,163 @@
+# modules/anomaly_detector.py
+
+import threading
+import numpy as np
+from modules.time_utils import format_epoch, local_utc_offset, now_epoch
+
+HOURS_PER_WEEK = 168
+# 1970-01-01 was a Thursday; shifting by three days makes hour-of-week 0 Monday 00:00
+EPOCH_WEEKDAY_HOURS = 3 * 24
+
+class AnomalyDetector:
+    """
+    Flags hourly volume spikes that no static rule covers. Every
+    (logfile, event_id, source) key gets a baseline per hour of the week: the
+    mean and variance of its hourly count at that hour.
+
+    Baselines are built in one pass from SQL-aggregated hourly counts with
+    NumPy, then updated with an EWMA as each hour completes. An hour whose
+    count sits more than `z_threshold` standard deviations above its baseline
+    raises an alert shaped like RuleEngine's.
+    """
+    def __init__(self, db_handler, z_threshold=4.0, min_count=10, min_weeks=2, alpha=0.1):
+        self.db_handler = db_handler
+        self.z_threshold = z_threshold
+        self.min_count = min_count # Ignore spikes too small to be worth an analyst's time
+        self.min_weeks = min_weeks # Hours of the week seen fewer times than this are not scored
+        self.alpha = alpha # EWMA weight of the newest week
+        self.keys = {} # (logfile, event_id, source) -> row in the baseline arrays
+        self.mean = np.zeros((0, HOURS_PER_WEEK))
+        self.var = np.zeros((0, HOURS_PER_WEEK))
+        self.weeks = np.zeros(HOURS_PER_WEEK, dtype=np.int64) # Observations per hour of week
+        self.last_bucket = None # Last complete hour folded into the baselines
+        self._alerted = set() # (key row, bucket) pairs already reported
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def hour_of_week(buckets, offset_hours):
+        """Maps epoch hour numbers to local hour-of-week (0 = Monday 00:00)."""
+        return (buckets + offset_hours + EPOCH_WEEKDAY_HOURS) % HOURS_PER_WEEK
+
+    def _key_rows(self, rows):
+        """Row index of every (logfile, event_id, source, ...) tuple, growing the arrays for new keys."""
+        keys = self.keys
+        indices = np.fromiter((keys.setdefault(row[:3], len(keys)) for row in rows), dtype=np.int64, count=len(rows))
+        missing = len(keys) - len(self.mean)
+        if missing > 0:
+            self.mean = np.vstack([self.mean, np.zeros((missing, HOURS_PER_WEEK))])
+            self.var = np.vstack([self.var, np.zeros((missing, HOURS_PER_WEEK))])
+        return indices
+
+    def _dense_counts(self, first_bucket, last_bucket, end_time):
+        """A (keys x hours) matrix of counts for hours first_bucket..last_bucket inclusive."""
+        rows = self.db_handler.bucket_counts(first_bucket * 3600, end_time)
+        key_rows = self._key_rows(rows)
+        counts = np.zeros((len(self.keys), last_bucket - first_bucket + 1))
+        if rows:
+            buckets = np.fromiter((row[3] for row in rows), dtype=np.int64, count=len(rows))
+            values = np.fromiter((row[4] for row in rows), dtype=np.float64, count=len(rows))
+            counts[key_rows, buckets - first_bucket] = values
+        return counts
+
+    def recompute(self, days=90, end_time=None):
+        """
+        Rebuilds every baseline from the last `days` of complete hours in the
+        database. Only hours from the oldest stored log onward count as observed:
+        hours before it (a fresh install, or logs already archived) have no data,
+        and scoring them as zeros would drag every baseline down.
+        """
+        end_time = end_time if end_time is not None else now_epoch()
+        retention_days = getattr(self.db_handler, "retention_days", None)
+        if retention_days is not None:
+            days = min(days, retention_days)
+        last_bucket = end_time // 3600 - 1
+        first_bucket = last_bucket - days * 24 + 1
+        first_timestamp = self.db_handler.first_timestamp()
+        if first_timestamp is not None:
+            first_bucket = max(first_bucket, first_timestamp // 3600)
+        with self._lock:
+            if first_timestamp is None or first_bucket > last_bucket:
+                # Nothing stored yet: no hour of the week has been observed
+                self.keys = {}
+                self.mean = np.zeros((0, HOURS_PER_WEEK))
+                self.var = np.zeros((0, HOURS_PER_WEEK))
+                self.weeks = np.zeros(HOURS_PER_WEEK, dtype=np.int64)
+                self.last_bucket = last_bucket
+                self._alerted.clear()
+                print("Anomaly baselines: no complete hours of logs yet.")
+                return 0
+            self.keys = {}
+            self.mean = np.zeros((0, HOURS_PER_WEEK))
+            self.var = np.zeros((0, HOURS_PER_WEEK))
+            counts = self._dense_counts(first_bucket, last_bucket, (last_bucket + 1) * 3600)
+            how = self.hour_of_week(np.arange(first_bucket, last_bucket + 1), local_utc_offset() // 3600)
+            # A (hours x 168) one-hot matrix turns per-hour counts into per-hour-of-week sums
+            one_hot = np.zeros((len(how), HOURS_PER_WEEK))
+            one_hot[np.arange(len(how)), how] = 1.0
+            self.weeks = one_hot.sum(axis=0).astype(np.int64)
+            observed = np.maximum(self.weeks, 1)
+            self.mean = (counts @ one_hot) / observed
+            self.var = np.maximum((counts ** 2 @ one_hot) / observed - self.mean ** 2, 0.0)
+            self.last_bucket = last_bucket
+            self._alerted.clear()
+        print(f"Anomaly baselines built for {len(self.keys)} event keys over {last_bucket - first_bucket + 1} hours.")
+        return len(self.keys)
+
+    def _score(self, counts, how):
+        """z-scores of one hour's counts (a vector over keys) against the hour-of-week baseline."""
+        mean = self.mean[:, how]
+        # Poisson-style floor so rare, steady events don't produce huge scores from tiny variances
+        std = np.maximum(np.sqrt(self.var[:, how]), np.maximum(np.sqrt(mean), 1.0))
+        return (counts - mean) / std
+
+    def _update(self, counts, how):
+        diff = counts - self.mean[:, how]
+        self.mean[:, how] += self.alpha * diff
+        self.var[:, how] = (1 - self.alpha) * (self.var[:, how] + self.alpha * diff ** 2)
+        self.weeks[how] += 1
+
+    def check_anomalies(self, end_time=None):
+        """
+        Scores every hour since the last check, including the hour in progress,
+        and folds completed hours into the baselines. Returns new alerts.
+        """
+        if self.last_bucket is None:
+            return []
+        end_time = end_time if end_time is not None else now_epoch()
+        current_bucket = end_time // 3600
+        alerts = []
+        with self._lock:
+            # After a long pause only the last week is worth scoring
+            first_bucket = max(self.last_bucket + 1, current_bucket - HOURS_PER_WEEK)
+            counts = self._dense_counts(first_bucket, current_bucket, end_time + 1)
+            offset_hours = local_utc_offset() // 3600
+            names = {row: key for key, row in self.keys.items()}
+            for column, bucket in enumerate(range(first_bucket, current_bucket + 1)):
+                how = int(self.hour_of_week(bucket, offset_hours))
+                hour_counts = counts[:, column]
+                if self.weeks[how] >= self.min_weeks:
+                    z = self._score(hour_counts, how)
+                    for row in np.flatnonzero((z >= self.z_threshold) & (hour_counts >= self.min_count)):
+                        if (row, bucket) in self._alerted:
+                            continue
+                        self._alerted.add((row, bucket))
+                        alerts.append(self._make_alert(names[row], bucket, hour_counts[row], self.mean[row, how], z[row]))
+                if bucket < current_bucket:
+                    self._update(hour_counts, how)
+                    self.last_bucket = bucket
+            self._alerted = {(row, bucket) for row, bucket in self._alerted if bucket >= self.last_bucket}
+        return alerts
+
+    def _make_alert(self, key, bucket, count, expected, z_score):
+        logfile, event_id, source = key
+        return {
+            "rule_name": f"Anomalous Volume: {logfile} {event_id} ({source})",
+            "description": f"{int(count)} events in the hour from {format_epoch(bucket * 3600, '%H:00')}, "
+                           f"usually ~{expected:.1f} at this hour of the week (z = {z_score:.1f}).",
+            "trigger_time": format_epoch(bucket * 3600),
+            "count": int(count),
+            "threshold": round(float(expected), 1),
+            "time_window_minutes": 60,
+            "log_ids": self.db_handler.rule_log_ids(logfile, {"event_id": event_id, "source": source},
+                                                    bucket * 3600, bucket * 3600 + 3599)
+        }
@@ -0,0 +1,199 @@
+# modules/backtester.py
+
+import json
+from operator import itemgetter
+from modules.bulk_importer import BulkImporter
+from modules.dedup_filter import RecentKeyFilter
+from modules.log_normalizer import LogNormalizer
+from modules.log_record import LogRecord
+from modules.time_utils import format_epoch
+
+class Backtester:
+    """
+    Replays the rules in rules.json over a historical time range and reports
+    every alert they would have raised.
+
+    Instead of one COUNT query per window, each rule step reads its matching
+    timestamps once, in order, and a two-pointer sweep finds every stretch of
+    time in which the window meets the threshold. Correlation rules fire where
+    the stretches of all their steps overlap. Each stretch is reported as one
+    alert with its first trigger time, its end and the peak count.
+    """
+    def __init__(self, db_handler=None, rules_filepath="rules.json", rules=None):
+        self.db_handler = db_handler
+        self.rules = rules if rules is not None else self._load_rules(rules_filepath)
+
+    def _load_rules(self, filepath):
+        try:
+            with open(filepath, 'r') as f:
+                return [rule for rule in json.load(f) if rule.get("enabled", False)]
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"Error loading rules for backtest from '{filepath}': {e}")
+            return []
+
+    @staticmethod
+    def rule_steps(rule, threshold=None):
+        """
+        Returns (window_seconds, steps) for a simple or correlation rule, where
+        each step is a dict with logfile, conditions and threshold. A simple rule
+        is a correlation with a single step.
+        """
+        if rule.get("type") == "correlation":
+            steps = [{"logfile": step["logfile"], "conditions": step["conditions"],
+                      "threshold": step.get("threshold", 1)} for step in rule["steps"]]
+            return rule["time_window_minutes"] * 60, steps
+        aggregation = rule["aggregation"]
+        step = {"logfile": rule["logfile"], "conditions": rule["conditions"],
+                "threshold": threshold if threshold is not None else aggregation["threshold"]}
+        return aggregation["time_window_minutes"] * 60, [step]
+
+    @staticmethod
+    def _step_key(step):
+        return step["logfile"], tuple(sorted(step["conditions"].items()))
+
+    @staticmethod
+    def _matches(record, step):
+        if record.logfile != step["logfile"]:
+            return False
+        return all(str(record.get(key)) == str(value) for key, value in step["conditions"].items())
+
+    def _archive_timestamps(self, archive_paths, all_steps, start_time, end_time):
+        """
+        Scans archive files once, adding matches to each (step, timestamps) pair.
+        A match is counted once per logs UNIQUE key: events repeated across
+        archives, or re-imported and so also in the database, are skipped.
+        """
+        importer = BulkImporter(self.db_handler, normalizer=LogNormalizer())
+        key_of = itemgetter(*RecentKeyFilter.KEY_COLUMNS)
+        seen = set()
+        for path in archive_paths:
+            try:
+                for raw in importer.iter_source(path):
+                    record = importer.normalizer.normalize("generic", raw)
+                    if not isinstance(record, LogRecord) or record.timestamp is None:
+                        continue
+                    if record.timestamp < start_time or record.timestamp > end_time:
+                        continue
+                    matched = [timestamps for step, timestamps in all_steps if self._matches(record, step)]
+                    if not matched:
+                        continue
+                    key = key_of(record.as_row())
+                    if key in seen or (self.db_handler is not None and self.db_handler.log_exists(key)):
+                        continue
+                    seen.add(key)
+                    for timestamps in matched:
+                        timestamps.append(record.timestamp)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"Failed to read archive {path}: {e}")
+
+    @staticmethod
+    def sweep(window, threshold, timestamps):
+        """
+        One ordered pass over a step's sorted timestamps with two pointers: `i`
+        is the newest event and `left` the oldest one still inside [t - window, t],
+        matching DatabaseHandler.count_logs_for_rule.
+
+        Raises:
+            ValueError: If `window` is not positive or `threshold` is below 1.
+
+        Returns:
+            list: [first_trigger, last_satisfied, peak_count] per alert episode.
+        """
+        if window <= 0 or threshold < 1:
+            raise ValueError(f"window must be > 0 and threshold >= 1 (got window={window}, threshold={threshold})")
+        episodes = []
+        current = None
+        left = 0
+        for i, ts in enumerate(timestamps):
+            low = ts - window
+            while timestamps[left] < low:
+                left += 1
+            count = i - left + 1
+            if count < threshold:
+                continue
+            # Still satisfied until the threshold-th newest event leaves the window
+            expiry = timestamps[i - threshold + 1] + window
+            if current is not None and ts <= current[1] + 1:
+                current[1] = expiry
+                if count > current[2]:
+                    current[2] = count
+            else:
+                current = [ts, expiry, count]
+                episodes.append(current)
+        return episodes
+
+    @staticmethod
+    def intersect(first, second):
+        """Overlap of two sorted episode lists: when every step of a correlation holds at once."""
+        overlap = []
+        i = j = 0
+        while i < len(first) and j < len(second):
+            start = max(first[i][0], second[j][0])
+            end = min(first[i][1], second[j][1])
+            if start <= end:
+                overlap.append([start, end, "N/A"])
+            if first[i][1] < second[j][1]:
+                i += 1
+            else:
+                j += 1
+        return overlap
+
+    def run(self, start_time, end_time, rule_names=None, threshold=None, archive_paths=None):
+        """
+        Backtests the rules over [start_time, end_time] (epoch seconds) using the
+        live database and, optionally, archive files.
+
+        Args:
+            rule_names (list): Only backtest these rules (default: all enabled rules).
+            threshold (int): Overrides the threshold of the selected simple rules.
+
+        Returns:
+            list: Alert dicts sorted by trigger time, shaped like RuleEngine alerts
+                  plus `trigger_epoch` and `end_time` (when the rule stopped matching).
+        """
+        rules = [rule for rule in self.rules if not rule_names or rule["rule_name"] in rule_names]
+        plans = []
+        for rule in rules:
+            window, steps = self.rule_steps(rule, threshold)
+            if window <= 0 or any(step["threshold"] < 1 for step in steps):
+                print(f"Skipping rule '{rule['rule_name']}': its window must be positive and its thresholds at least 1.")
+                continue
+            plans.append((rule, window, steps))
+        # Events just before the range still count towards its first windows
+        earliest = start_time - max((plan[1] for plan in plans), default=0)
+
+        # Rules often share a step (e.g. 4625 in a simple and a correlation rule); read each once
+        fetched = {}
+        for rule, window, steps in plans:
+            for step in steps:
+                key = self._step_key(step)
+                if key not in fetched:
+                    fetched[key] = (step, self.db_handler.rule_timestamps(
+                        step["logfile"], step["conditions"], earliest, end_time) if self.db_handler is not None else [])
+        if archive_paths:
+            self._archive_timestamps(archive_paths, list(fetched.values()), earliest, end_time)
+        for step, timestamps in fetched.values():
+            timestamps.sort() # Already ordered from SQLite; archive matches are appended after
+
+        alerts = []
+        for rule, window, steps in plans:
+            episodes = None
+            for step in steps:
+                timestamps = fetched[self._step_key(step)][1]
+                step_episodes = self.sweep(window, step["threshold"], timestamps)
+                episodes = step_episodes if episodes is None else self.intersect(episodes, step_episodes)
+            for first, last, peak in episodes or []:
+                if last < start_time or first > end_time:
+                    continue
+                alerts.append({
+                    "rule_name": rule["rule_name"],
+                    "description": rule["description"],
+                    "trigger_time": format_epoch(first),
+                    "trigger_epoch": first,
+                    "end_time": format_epoch(min(last, end_time)),
+                    "count": peak,
+                    "threshold": steps[0]["threshold"] if len(steps) == 1 else "N/A",
+                    "time_window_minutes": window // 60
+                })
+        alerts.sort(key=lambda alert: alert["trigger_epoch"])
+        return alerts
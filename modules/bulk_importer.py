@@ -0,0 +1,157 @@
+# modules/bulk_importer.py
+
+import csv
+import gzip
+import json
+import sys
+import time
+import xml.etree.ElementTree as ET
+from modules.log_normalizer import LogNormalizer
+from modules.log_record import LogRecord
+from modules.time_utils import utc_to_epoch
+
+# Archive rows can carry very long messages (e.g. script block logging)
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+EVTX_NS = "{http://schemas.microsoft.com/win/2004/08/events/event}"
+EVTX_LEVELS = {"1": "Error", "2": "Error", "3": "Warning", "4": "Information", "0": "Information"}
+AUDIT_SUCCESS_KEYWORD = 0x0020000000000000
+AUDIT_FAILURE_KEYWORD = 0x0010000000000000
+
+class BulkImporter:
+    """
+    Streams offline evidence (SecLog CSV archives, JSON/JSONL exports and EVTX
+    files) through LogNormalizer's generic path and bulk-loads it into the database.
+    """
+    def __init__(self, db_handler, normalizer=None, batch_size=50_000):
+        self.db_handler = db_handler
+        self.normalizer = normalizer or LogNormalizer()
+        self.batch_size = batch_size
+
+    # --- Readers: each yields generic raw dicts ---
+    @staticmethod
+    def _open_text(path):
+        if path.lower().endswith(".gz"):
+            return gzip.open(path, "rt", newline="", encoding="utf-8")
+        return open(path, "r", newline="", encoding="utf-8")
+
+    def _read_csv(self, path):
+        with self._open_text(path) as f:
+            yield from csv.DictReader(f)
+
+    def _read_json(self, path):
+        with self._open_text(path) as f:
+            first = f.read(1)
+            while first and first.isspace():
+                first = f.read(1)
+            if first == "[":
+                # A plain JSON array has to be parsed whole; JSONL is streamed line by line
+                yield from json.loads(first + f.read())
+                return
+            pending = first
+            for line in f:
+                line = (pending + line).strip()
+                pending = ""
+                if line:
+                    yield json.loads(line)
+
+    def _read_evtx(self, path):
+        try:
+            from Evtx.Evtx import Evtx
+        except ImportError:
+            raise RuntimeError("Reading .evtx files requires the 'python-evtx' package (pip install python-evtx).")
+        with Evtx(path) as log:
+            for record in log.records():
+                try:
+                    yield self._evtx_to_dict(ET.fromstring(record.xml()))
+                except ET.ParseError as e:
+                    print(f"Skipping unreadable EVTX record in {path}: {e}")
+
+    def _evtx_to_dict(self, event):
+        system = event.find(f"{EVTX_NS}System")
+        provider = system.find(f"{EVTX_NS}Provider")
+        created = system.find(f"{EVTX_NS}TimeCreated").get("SystemTime", "")
+        keywords = int(system.findtext(f"{EVTX_NS}Keywords") or "0", 16)
+        if keywords & AUDIT_SUCCESS_KEYWORD:
+            event_type = "Success Audit"
+        elif keywords & AUDIT_FAILURE_KEYWORD:
+            event_type = "Failure Audit"
+        else:
+            event_type = EVTX_LEVELS.get(system.findtext(f"{EVTX_NS}Level") or "4", "Unknown")
+
+        # EVTX carries no rendered message, so the event data fields stand in for it
+        fields = []
+        for data in event.iter(f"{EVTX_NS}Data"):
+            name = data.get("Name")
+            fields.append(f"{name}: {data.text or ''}" if name else (data.text or ""))
+        return {
+            "timestamp": utc_to_epoch(created),
+            "logfile": system.findtext(f"{EVTX_NS}Channel") or "EVTX",
+            "source": provider.get("Name", "Unknown") if provider is not None else "Unknown",
+            "event_id": (system.findtext(f"{EVTX_NS}EventID") or "").strip(),
+            "event_type": event_type,
+            "message": "\n".join(fields) or f"Event {system.findtext(f'{EVTX_NS}EventID')}"
+        }
+
+    def iter_source(self, path):
+        """Yields raw generic records from one file, picking the reader from its extension."""
+        lower = path.lower()
+        if lower.endswith(".evtx"):
+            return self._read_evtx(path)
+        if lower.endswith((".jsonl", ".jsonl.gz", ".json", ".json.gz")):
+            return self._read_json(path)
+        if lower.endswith((".csv", ".csv.gz")):
+            return self._read_csv(path)
+        raise ValueError(f"Unsupported file type: {path}")
+
+    # --- Loading ---
+    def _normalized_batches(self, paths, summary, progress_callback):
+        batch = []
+        for path in paths:
+            print(f"Importing {path}...")
+            try:
+                for raw in self.iter_source(path):
+                    summary["read"] += 1
+                    record = self.normalizer.normalize("generic", raw)
+                    if not isinstance(record, LogRecord):
+                        summary["failed"] += 1
+                        continue
+                    if record.timestamp:
+                        if summary["first"] is None or record.timestamp < summary["first"]:
+                            summary["first"] = record.timestamp
+                        if summary["last"] is None or record.timestamp > summary["last"]:
+                            summary["last"] = record.timestamp
+                    batch.append(record)
+                    if len(batch) >= self.batch_size:
+                        yield batch
+                        batch = []
+                        if progress_callback:
+                            progress_callback(summary)
+                summary["files"] += 1
+            except (OSError, ValueError, RuntimeError, csv.Error) as e:
+                print(f"Failed to import {path}: {e}")
+                summary["failed_files"].append(path)
+        if batch:
+            yield batch
+
+    def import_files(self, paths, progress_callback=None):
+        """
+        Imports every file in `paths`. Rows already in the database are skipped
+        by its UNIQUE constraint.
+
+        Returns:
+            dict: counts, the imported time range and the load rate.
+        """
+        summary = {"files": 0, "failed_files": [], "read": 0, "failed": 0,
+                   "inserted": 0, "duplicates": 0, "first": None, "last": None}
+        start = time.perf_counter()
+        offered, inserted = self.db_handler.bulk_insert_logs(
+            self._normalized_batches(paths, summary, progress_callback))
+        seconds = time.perf_counter() - start
+        summary.update({
+            "inserted": inserted,
+            "duplicates": offered - inserted,
+            "seconds": round(seconds, 2),
+            "rows_per_sec": round(summary["read"] / seconds, 1) if seconds > 0 else None
+        })
+        return summary
@@ -1,7 +1,7 @@
 # modules/correlation_engine.py
 
 import json
-from datetime import datetime, timedelta
+from modules.time_utils import format_epoch, now_epoch
 
 class CorrelationEngine:
     """
@@ -27,10 +27,11 @@ class CorrelationEngine:
             print(f"Error loading correlation rules: {e}")
             return []
 
-    def check_correlations(self):
+    def check_correlations(self, end_time=None):
         """
         A simplified correlation check.
-        For each rule, it checks if all steps occurred within the time window.
+        For each rule, it checks if all steps occurred within the time window
+        ending now (or at `end_time`, epoch seconds, for historical checks).
         """
         if not self.db_handler:
             return []
@@ -40,11 +41,12 @@ class CorrelationEngine:
 
         for rule in self.correlation_rules:
             all_steps_found = True
+            log_ids = []
             
             # Define the overall time window for the entire multi-step attack
             time_window = rule["time_window_minutes"]
-            end_time = datetime.now()
-            start_time = end_time - timedelta(minutes=time_window)
+            window_end = end_time if end_time is not None else now_epoch()
+            start_time = window_end - time_window * 60
             
             print(f"Checking correlation rule: '{rule['rule_name']}'")
 
@@ -53,21 +55,29 @@ class CorrelationEngine:
                 log_count = self.db_handler.count_logs_for_rule(
                     logfile=step["logfile"],
                     conditions=step["conditions"],
-                    start_time=start_time.strftime("%Y-%m-%d %H:%M:%S")
+                    start_time=start_time,
+                    end_time=end_time
                 )
 
                 if log_count < step.get("threshold", 1):
                     all_steps_found = False
                     break # If one step is missing, the pattern is broken
+                log_ids += self.db_handler.rule_log_ids(
+                    logfile=step["logfile"],
+                    conditions=step["conditions"],
+                    start_time=start_time,
+                    end_time=end_time
+                )
             
             if all_steps_found:
                 alert = {
                     "rule_name": rule["rule_name"],
                     "description": rule["description"],
-                    "trigger_time": end_time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "trigger_time": format_epoch(window_end),
                     "count": "N/A", # Count is complex in correlation, simplifying for now
                     "threshold": "N/A",
-                    "time_window_minutes": time_window
+                    "time_window_minutes": time_window,
+                    "log_ids": log_ids
                 }
                 triggered_alerts.append(alert)
         
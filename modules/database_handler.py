@@ -2,24 +2,41 @@
 
 import sqlite3
 import os
+import time
 from collections import Counter
-from datetime import datetime, timedelta
+from datetime import datetime
 import csv
 import gzip # 👈 Import for compression
+from modules.metrics import metrics
+from modules.log_record import LogRecord
+from modules.time_utils import date_to_epoch, format_epoch, now_epoch
+from modules.dedup_filter import RecentKeyFilter
+from modules.query_cache import QueryCache
 
 class DatabaseHandler:
-    def __init__(self, db_path="data/seclog.db", archive_path="data/logs_archive/"):
+    # Bumped whenever the on-disk schema changes; stored in PRAGMA user_version
+    SCHEMA_VERSION = 2
+    EVIDENCE_LIMIT = 1000 # Matching log ids kept per alert; the alert's count stays exact
+    LOGS_TABLE_SQL = """CREATE TABLE IF NOT EXISTS {name} (id INTEGER PRIMARY KEY, timestamp INTEGER, logfile TEXT, source TEXT, event_id TEXT, event_type TEXT, severity TEXT, message TEXT, UNIQUE(timestamp, logfile, source, event_id, message))"""
+
+    def __init__(self, db_path="data/seclog.db", archive_path="data/logs_archive/", retention_days=30):
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         os.makedirs(archive_path, exist_ok=True) # 👈 Ensure archive directory exists
         self.db_path = db_path
         self.archive_path = archive_path
+        self.retention_days = retention_days # None keeps logs forever
         self.conn = None
+        self.recent_keys = RecentKeyFilter()
+        self.query_cache = QueryCache()
+        self.write_generation = 0 # Bumped on every write that can change query results
         try:
             self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self.conn.row_factory = sqlite3.Row
             self.setup_database()
+            self.recent_keys.prime(self.conn)
             # 🔹 CHANGE: Call archive instead of delete 🔹
-            self.archive_old_logs(retention_days=30)
+            if retention_days is not None:
+                self.archive_old_logs(retention_days=retention_days)
         except sqlite3.Error as e:
             print(f"Database error: {e}")
 
@@ -27,17 +44,22 @@ class DatabaseHandler:
     def archive_old_logs(self, retention_days):
         """
         Selects logs older than the retention period, saves them to a compressed
-        CSV file, and then deletes them from the database.
+        CSV file, and then deletes them from the database. Logs inside a retention
+        hold (e.g. imported evidence, see `add_retention_hold`) are kept.
         """
         cursor = self.conn.cursor()
-        cutoff_date = datetime.now() - timedelta(days=retention_days)
-        cutoff_timestamp = cutoff_date.strftime("%Y-%m-%d %H:%M:%S")
+        cutoff_timestamp = now_epoch() - retention_days * 86400
+        expired = """timestamp < ? AND NOT EXISTS (SELECT 1 FROM retention_holds AS hold
+                     WHERE logs.timestamp BETWEEN hold.first_timestamp AND hold.last_timestamp)"""
 
-        print(f"Archiving logs older than {retention_days} days (before {cutoff_timestamp})...")
+        print(f"Archiving logs older than {retention_days} days (before {format_epoch(cutoff_timestamp)})...")
         try:
             # Step 1: Select old logs
-            cursor.execute("SELECT * FROM logs WHERE timestamp < ?", (cutoff_timestamp,))
+            cursor.execute(f"SELECT * FROM logs WHERE {expired}", (cutoff_timestamp,))
             old_logs = [dict(row) for row in cursor.fetchall()]
+            # Archives keep the readable local-time column they have always had
+            for log in old_logs:
+                log["timestamp"] = format_epoch(log["timestamp"])
 
             if not old_logs:
                 print("No old logs to archive.")
@@ -56,8 +78,9 @@ class DatabaseHandler:
             print(f"Successfully archived {len(old_logs)} logs to {archive_filepath}")
 
             # Step 3: Delete the old logs from the database
-            cursor.execute("DELETE FROM logs WHERE timestamp < ?", (cutoff_timestamp,))
+            cursor.execute(f"DELETE FROM logs WHERE {expired}", (cutoff_timestamp,))
             self.conn.commit()
+            self._bump_write_generation()
             print(f"Successfully deleted {len(old_logs)} archived logs from the live database.")
 
         except Exception as e:
@@ -66,32 +89,146 @@ class DatabaseHandler:
     # ... (rest of the file is unchanged) ...
     def setup_database(self):
         cursor = self.conn.cursor()
-        cursor.execute("""CREATE TABLE IF NOT EXISTS logs (id INTEGER PRIMARY KEY, timestamp TEXT, logfile TEXT, source TEXT, event_id TEXT, event_type TEXT, severity TEXT, message TEXT, UNIQUE(timestamp, logfile, source, event_id, message))""")
+        cursor.execute(self.LOGS_TABLE_SQL.format(name="logs"))
         cursor.execute("""CREATE TABLE IF NOT EXISTS incidents (id INTEGER PRIMARY KEY, rule_name TEXT, trigger_time TEXT, status TEXT, notes TEXT)""")
+        self._migrate_schema()
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON logs (timestamp);")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_logfile ON logs (logfile);")
+        # Incident list filters by status and pages newest first
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_incidents_status_time ON incidents (status, trigger_time);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_incidents_time ON incidents (trigger_time);")
+        # Incident <-> log evidence; the primary key makes "evidence of incident N" one index range
+        cursor.execute("""CREATE TABLE IF NOT EXISTS incident_evidence (incident_id INTEGER NOT NULL, log_id INTEGER NOT NULL, PRIMARY KEY (incident_id, log_id)) WITHOUT ROWID""")
+        # Time ranges exempt from retention, so imported history survives the next app start
+        cursor.execute("""CREATE TABLE IF NOT EXISTS retention_holds (id INTEGER PRIMARY KEY, first_timestamp INTEGER NOT NULL, last_timestamp INTEGER NOT NULL, reason TEXT, created INTEGER)""")
+        cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
         self.conn.commit()
-        print("Database setup complete. 'logs' and 'incidents' tables are ready.")
+        print("Database setup complete. 'logs', 'incidents', 'incident_evidence' and 'retention_holds' tables are ready.")
+
+    def _migrate_schema(self):
+        """
+        Upgrades databases created before timestamps were integer epochs. The old
+        TEXT column held local '%Y-%m-%d %H:%M:%S' strings; SQLite's 'utc' modifier
+        converts them to UTC epoch seconds. The copy runs in one transaction, so an
+        interrupted migration leaves the original table untouched.
+        """
+        cursor = self.conn.cursor()
+        columns = {row[1]: row[2].upper() for row in cursor.execute("PRAGMA table_info(logs)")}
+        if columns.get("timestamp") != "TEXT":
+            return
+        row_count = cursor.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+        print(f"Migrating {row_count} logs to integer epoch timestamps...")
+        with metrics.stage("migration"):
+            self.conn.commit()
+            try:
+                cursor.execute("BEGIN")
+                cursor.execute("DROP TABLE IF EXISTS logs_migrated")
+                cursor.execute(self.LOGS_TABLE_SQL.format(name="logs_migrated"))
+                cursor.execute("""INSERT OR IGNORE INTO logs_migrated (id, timestamp, logfile, source, event_id, event_type, severity, message)
+                                  SELECT id, CAST(strftime('%s', timestamp, 'utc') AS INTEGER), logfile, source, event_id, event_type, severity, message
+                                  FROM logs ORDER BY id""")
+                unparsed = cursor.execute("SELECT COUNT(*) FROM logs_migrated WHERE timestamp IS NULL").fetchone()[0]
+                cursor.execute("DROP TABLE logs")
+                cursor.execute("ALTER TABLE logs_migrated RENAME TO logs")
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+        if unparsed:
+            print(f"Warning: {unparsed} log(s) had unparseable timestamps and were migrated with a NULL timestamp.")
+        print("Timestamp migration complete.")
+
+    def add_retention_hold(self, first_timestamp, last_timestamp, reason=""):
+        """Keeps logs between the two epochs (inclusive) out of `archive_old_logs` until the hold is released."""
+        try:
+            self.conn.execute("INSERT INTO retention_holds (first_timestamp, last_timestamp, reason, created) VALUES (?, ?, ?, ?)",
+                              (first_timestamp, last_timestamp, reason, now_epoch()))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Failed to add retention hold: {e}")
+
+    def get_retention_holds(self):
+        try:
+            return [dict(row) for row in self.conn.execute("SELECT * FROM retention_holds ORDER BY first_timestamp")]
+        except sqlite3.Error as e:
+            print(f"Failed to get retention holds: {e}")
+            return []
+
+    def release_retention_holds(self):
+        """Drops every hold; the held logs are archived at the next start like any other old log."""
+        try:
+            released = self.conn.execute("DELETE FROM retention_holds").rowcount
+            self.conn.commit()
+            return released
+        except sqlite3.Error as e:
+            print(f"Failed to release retention holds: {e}")
+            return 0
 
     def create_incident(self, alert):
+        """Stores an incident for `alert` and links the log ids it carries in 'log_ids' as evidence."""
         cursor = self.conn.cursor()
         try:
             cursor.execute("INSERT INTO incidents (rule_name, trigger_time, status, notes) VALUES (?, ?, ?, ?)", (alert['rule_name'], alert['trigger_time'], 'Open', ''))
+            incident_id = cursor.lastrowid
+            cursor.executemany("INSERT OR IGNORE INTO incident_evidence (incident_id, log_id) VALUES (?, ?)",
+                               ((incident_id, log_id) for log_id in alert.get('log_ids', ())))
             self.conn.commit()
-            return cursor.lastrowid
+            return incident_id
         except sqlite3.Error as e:
+            self.conn.rollback()
             print(f"Failed to create incident: {e}")
             return None
 
     def get_all_incidents(self):
+        return self.get_incidents(limit=None)
+
+    def get_incidents(self, status=None, limit=25, offset=0):
+        """One page of incidents, newest first, optionally only those with `status`."""
         cursor = self.conn.cursor()
+        query = "SELECT * FROM incidents"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY trigger_time DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
         try:
-            cursor.execute("SELECT * FROM incidents ORDER BY trigger_time DESC")
+            cursor.execute(query, params)
             return [dict(row) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             print(f"Failed to get incidents: {e}")
             return []
 
+    def count_incidents(self, status=None):
+        cursor = self.conn.cursor()
+        try:
+            if status:
+                cursor.execute("SELECT COUNT(*) FROM incidents WHERE status = ?", (status,))
+            else:
+                cursor.execute("SELECT COUNT(*) FROM incidents")
+            return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Failed to count incidents: {e}")
+            return 0
+
+    def get_incident_evidence(self, incident_id):
+        """The logs linked to an incident, newest first. Archived logs drop out of the join."""
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        try:
+            cursor.execute("""SELECT logs.id, timestamp, logfile, source, event_id, event_type, severity, message
+                              FROM incident_evidence JOIN logs ON logs.id = incident_evidence.log_id
+                              WHERE incident_evidence.incident_id = ? ORDER BY timestamp DESC""", (incident_id,))
+            return [
+                LogRecord(timestamp, logfile, source, event_id, event_type, severity, message, log_id)
+                for log_id, timestamp, logfile, source, event_id, event_type, severity, message in cursor
+            ]
+        except sqlite3.Error as e:
+            print(f"Failed to get incident evidence: {e}")
+            return []
+
     def update_incident_status(self, incident_id, new_status):
         cursor = self.conn.cursor()
         try:
@@ -101,22 +238,107 @@ class DatabaseHandler:
             print(f"Failed to update incident status: {e}")
 
     def insert_logs(self, logs):
-        if not logs: return
+        """Stores new logs, skipping ones already present. Returns False only if SQLite failed."""
+        if not logs: return True
         cursor = self.conn.cursor()
         logs_to_insert = []
         for log in logs:
-            if "error" not in log:
-                logs_to_insert.append((log.get("timestamp"), log.get("logfile"), log.get("source"), log.get("event_id"), log.get("event_type"), log.get("severity"), log.get("message")))
-        if not logs_to_insert: return
+            if isinstance(log, LogRecord):
+                logs_to_insert.append(log.as_row())
+            elif "error" not in log:
+                logs_to_insert.append(tuple(log.get(field) for field in LogRecord.FIELDS))
+        if not logs_to_insert: return True
+        offered = len(logs_to_insert)
+        fingerprints = []
+        if self.recent_keys is not None:
+            # Most of a sync re-offers rows we just stored; skip them before SQLite does the B-tree probe
+            logs_to_insert, fingerprints = self.recent_keys.filter(logs_to_insert)
+            metrics.incr("dedup_filter_hits", offered - len(logs_to_insert))
+            metrics.incr("dedup_filter_misses", len(logs_to_insert))
+        metrics.incr("rows_offered", offered)
+        if not logs_to_insert: return True
         try:
-            cursor.executemany("INSERT OR IGNORE INTO logs (timestamp, logfile, source, event_id, event_type, severity, message) VALUES (?, ?, ?, ?, ?, ?, ?)", logs_to_insert)
-            self.conn.commit()
+            with metrics.stage("insert"):
+                start = time.perf_counter()
+                changes_before = self.conn.total_changes
+                cursor.executemany("INSERT OR IGNORE INTO logs (timestamp, logfile, source, event_id, event_type, severity, message) VALUES (?, ?, ?, ?, ?, ?, ?)", logs_to_insert)
+                self.conn.commit()
+            inserted = self.conn.total_changes - changes_before
+            metrics.incr("rows_inserted", inserted)
+            if inserted:
+                timestamps = [row[0] for row in logs_to_insert]
+                self._bump_write_generation(None if None in timestamps else min(timestamps))
+            if self.recent_keys is not None:
+                self.recent_keys.remember(fingerprints)
+                self.recent_keys.record_insert(time.perf_counter() - start, len(logs_to_insert))
+                stats = self.recent_keys.stats()
+                metrics.set_gauge("dedup_entries", stats["entries"])
+                metrics.set_gauge("dedup_saved_insert_seconds", stats["saved_insert_seconds"])
+            return True
         except sqlite3.Error as e:
             print(f"Failed to insert logs into database: {e}")
+            return False
 
-    def query_logs(self, log_sources=None, start_date=None, end_date=None, keyword=None):
+    def bulk_insert_logs(self, batches, commit_every=500_000):
+        """
+        Loads an iterable of LogRecord batches as fast as SQLite allows: secondary
+        indexes are dropped and rebuilt once at the end, durability is relaxed and
+        rows are committed in large transactions. The UNIQUE constraint still
+        de-duplicates against existing rows.
+
+        Returns:
+            tuple: (rows_offered, rows_inserted)
+        """
         cursor = self.conn.cursor()
-        query = "SELECT * FROM logs"
+        offered = inserted = pending = 0
+        cursor.execute("DROP INDEX IF EXISTS idx_timestamp")
+        cursor.execute("DROP INDEX IF EXISTS idx_logfile")
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA cache_size = -200000") # ~200 MB page cache for the load
+        try:
+            for batch in batches:
+                rows = [log.as_row() for log in batch if isinstance(log, LogRecord)]
+                changes_before = self.conn.total_changes
+                cursor.executemany("INSERT OR IGNORE INTO logs (timestamp, logfile, source, event_id, event_type, severity, message) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                offered += len(rows)
+                inserted += self.conn.total_changes - changes_before
+                pending += len(rows)
+                if pending >= commit_every:
+                    self.conn.commit()
+                    pending = 0
+            self.conn.commit()
+        finally:
+            self.conn.rollback()
+            with metrics.stage("index_build"):
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON logs (timestamp);")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_logfile ON logs (logfile);")
+                # Fresh statistics stop the planner preferring idx_logfile over a time range
+                cursor.execute("ANALYZE logs")
+            cursor.execute("PRAGMA synchronous = FULL")
+            cursor.execute("PRAGMA cache_size = -2000")
+            self.conn.commit()
+        if inserted:
+            self._bump_write_generation()
+        metrics.incr("rows_offered", offered)
+        metrics.incr("rows_inserted", inserted)
+        return offered, inserted
+
+    def _bump_write_generation(self, oldest_timestamp=None):
+        """Marks a write; cached queries ending before `oldest_timestamp` survive it."""
+        self.write_generation += 1
+        if self.query_cache is not None:
+            self.query_cache.on_write(self.write_generation, oldest_timestamp)
+
+    # Columns the Summary tab can facet on (see FacetIndex.FACETS)
+    FACET_COLUMNS = ("event_id", "source", "severity", "event_type", "logfile")
+
+    def _build_log_filters(self, log_sources=None, start_date=None, end_date=None, keyword=None, start_time=None, end_time=None, facets=None):
+        """
+        Returns the WHERE clause (possibly empty) and parameters for the sidebar
+        filters. `start_time`/`end_time` are optional epoch bounds [start, end),
+        used when drilling into the event graph. `facets` ({column: values})
+        adds one IN clause per column, as the Summary tab's selections do.
+        """
         conditions, params = [], []
         if log_sources and "All" not in log_sources:
             placeholders = ', '.join('?' for _ in log_sources)
@@ -124,29 +346,108 @@ class DatabaseHandler:
             params.extend(log_sources)
         if start_date:
             conditions.append("timestamp >= ?")
-            params.append(start_date)
+            params.append(date_to_epoch(start_date))
         if end_date:
-            conditions.append("timestamp < date(?, '+1 day')")
-            params.append(end_date)
+            conditions.append("timestamp < ?")
+            params.append(date_to_epoch(end_date, days=1))
+        if start_time is not None:
+            conditions.append("timestamp >= ?")
+            params.append(start_time)
+        if end_time is not None:
+            conditions.append("timestamp < ?")
+            params.append(end_time)
         if keyword:
             conditions.append("message LIKE ?")
             params.append(f"%{keyword}%")
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
+        for column, values in (facets or {}).items():
+            if column not in self.FACET_COLUMNS:
+                raise ValueError(f"Unknown facet column '{column}'")
+            values = list(values)
+            if not values:
+                continue
+            present = [value for value in values if value is not None]
+            clauses = [f"{column} IN ({', '.join('?' for _ in present)})"] if present else []
+            if len(present) < len(values):
+                clauses.append(f"{column} IS NULL") # IN never matches NULL
+            conditions.append("(" + " OR ".join(clauses) + ")")
+            params.extend(present)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, params
+
+    def query_logs(self, log_sources=None, start_date=None, end_date=None, keyword=None, start_time=None, end_time=None):
+        cache_key = None
+        if self.query_cache is not None:
+            cache_key = QueryCache.make_key(log_sources, start_date, end_date, keyword, start_time, end_time)
+            cached = self.query_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            generation = self.write_generation
+        cursor = self.conn.cursor()
+        try:
+            where, params = self._build_log_filters(log_sources, start_date, end_date, keyword, start_time, end_time)
+        except ValueError as e:
+            print(f"Invalid date filter, expected YYYY-MM-DD: {e}")
+            return [], Counter()
+        query = "SELECT id, timestamp, logfile, source, event_id, event_type, severity, message FROM logs" + where
         query += " ORDER BY timestamp DESC"
         try:
-            cursor.execute(query, params)
-            results = [dict(row) for row in cursor.fetchall()]
-            counts = Counter(log['source'] for log in results)
+            with metrics.stage("query"):
+                cursor.row_factory = None # Plain tuples; rows go straight into LogRecord
+                cursor.execute(query, params)
+                results = [
+                    LogRecord(timestamp, logfile, source, event_id, event_type, severity, message, log_id)
+                    for log_id, timestamp, logfile, source, event_id, event_type, severity, message in cursor
+                ]
+                counts = Counter(log.source for log in results)
+            metrics.incr("rows_queried", len(results))
+            if cache_key is not None:
+                bounds = [bound for bound in (date_to_epoch(end_date, days=1) if end_date else None, end_time) if bound is not None]
+                end_bound = min(bounds) if bounds else None
+                self.query_cache.put(cache_key, generation, end_bound, results, counts)
             return results, counts
         except sqlite3.Error as e:
             print(f"Failed to query logs: {e}")
             return [], Counter()
 
-    def count_logs_for_rule(self, logfile, conditions, start_time):
+    def count_logs(self, log_sources=None, start_date=None, end_date=None, keyword=None, start_time=None, end_time=None, facets=None):
+        """Counts the logs matching the sidebar filters without materializing them."""
+        try:
+            where, params = self._build_log_filters(log_sources, start_date, end_date, keyword, start_time, end_time, facets)
+            return self.conn.execute("SELECT COUNT(*) FROM logs" + where, params).fetchone()[0]
+        except ValueError as e:
+            print(f"Invalid date filter, expected YYYY-MM-DD: {e}")
+            return 0
+        except sqlite3.Error as e:
+            print(f"Failed to count logs: {e}")
+            return 0
+
+    def iter_logs(self, log_sources=None, start_date=None, end_date=None, keyword=None, start_time=None, end_time=None,
+                  facets=None, batch_size=5000):
+        """
+        Streams matching logs as lists of row tuples (in LogRecord.FIELDS order, epoch
+        timestamps), newest first.
+        Uses its own connection so a long export never holds the shared one.
+        """
+        where, params = self._build_log_filters(log_sources, start_date, end_date, keyword, start_time, end_time, facets)
+        query = f"SELECT {', '.join(LogRecord.FIELDS)} FROM logs{where} ORDER BY timestamp DESC"
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    def count_logs_for_rule(self, logfile, conditions, start_time, end_time=None):
         cursor = self.conn.cursor()
         query = "SELECT COUNT(*) FROM logs WHERE logfile = ? AND timestamp >= ?"
         params = [logfile, start_time]
+        if end_time is not None:
+            query += " AND timestamp <= ?"
+            params.append(end_time)
         for key, value in conditions.items():
             query += f" AND {key} = ?"
             params.append(value)
@@ -157,5 +458,91 @@ class DatabaseHandler:
             print(f"Failed to count logs for rule: {e}")
             return 0
             
+    def rule_log_ids(self, logfile, conditions, start_time, end_time=None, limit=None):
+        """Ids of the logs matching a rule in [start_time, end_time], newest first; used as incident evidence."""
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        query = "SELECT id FROM logs WHERE logfile = ? AND timestamp >= ?"
+        params = [logfile, start_time]
+        if end_time is not None:
+            query += " AND timestamp <= ?"
+            params.append(end_time)
+        for key, value in conditions.items():
+            query += f" AND {key} = ?"
+            params.append(value)
+        query += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(limit if limit is not None else self.EVIDENCE_LIMIT)
+        try:
+            cursor.execute(query, params)
+            return [row[0] for row in cursor]
+        except sqlite3.Error as e:
+            print(f"Failed to read log ids for rule: {e}")
+            return []
+
+    def rule_timestamps(self, logfile, conditions, start_time, end_time):
+        """Timestamps of the logs matching a rule in [start_time, end_time], oldest first."""
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        query = "SELECT timestamp FROM logs WHERE logfile = ? AND timestamp >= ? AND timestamp <= ?"
+        params = [logfile, start_time, end_time]
+        for key, value in conditions.items():
+            query += f" AND {key} = ?"
+            params.append(value)
+        try:
+            cursor.execute(query + " ORDER BY timestamp", params)
+            return [row[0] for row in cursor]
+        except sqlite3.Error as e:
+            print(f"Failed to read timestamps for rule: {e}")
+            return []
+
+    def log_exists(self, key):
+        """True if a log with this UNIQUE key (timestamp, logfile, source, event_id, message) is stored."""
+        try:
+            return self.conn.execute("""SELECT 1 FROM logs WHERE timestamp = ? AND logfile = ? AND source = ?
+                                        AND event_id = ? AND message = ?""", key).fetchone() is not None
+        except sqlite3.Error as e:
+            print(f"Failed to look up log: {e}")
+            return False
+
+    def first_timestamp(self):
+        """Epoch of the oldest stored log, or None when there are none."""
+        try:
+            return self.conn.execute("SELECT MIN(timestamp) FROM logs").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Failed to read the oldest log time: {e}")
+            return None
+
+    def bucket_counts(self, start_time, end_time, bucket_seconds=3600):
+        """
+        Log counts per (logfile, event_id, source, bucket) for logs in
+        [start_time, end_time), where bucket = timestamp // bucket_seconds.
+        """
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        try:
+            cursor.execute(
+                "SELECT logfile, event_id, source, timestamp / ? AS bucket, COUNT(*) FROM logs "
+                "WHERE timestamp >= ? AND timestamp < ? GROUP BY logfile, event_id, source, bucket",
+                (bucket_seconds, start_time, end_time))
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Failed to count logs per bucket: {e}")
+            return []
+
+    def histogram_counts(self, bucket_seconds=60, log_sources=None, keyword=None):
+        """(bucket, count) pairs for the logs matching the filters, where bucket = timestamp // bucket_seconds."""
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        where, params = self._build_log_filters(log_sources, keyword=keyword)
+        # Rows the epoch migration could not parse have no place on a time axis
+        where += " AND timestamp IS NOT NULL" if where else " WHERE timestamp IS NOT NULL"
+        try:
+            cursor.execute(f"SELECT timestamp / ? AS bucket, COUNT(*) FROM logs{where} GROUP BY bucket ORDER BY bucket",
+                           [bucket_seconds] + params)
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Failed to build event histogram: {e}")
+            return []
+
     def close(self):
         if self.conn: self.conn.close()
\ No newline at end of file
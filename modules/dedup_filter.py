@@ -0,0 +1,101 @@
+# modules/dedup_filter.py
+
+import threading
+from collections import OrderedDict
+from operator import itemgetter
+from modules.time_utils import now_epoch
+
+class RecentKeyFilter:
+    """
+    Remembers fingerprints of recently stored logs so that records which are
+    already in the database can be dropped before they reach SQLite's
+    UNIQUE(timestamp, logfile, source, event_id, message) probe.
+
+    Only logs inside the time horizon are tracked; anything older is passed
+    through and left to the UNIQUE constraint, so the filter can never make a
+    log go missing because it forgot about it.
+    """
+    # Positions of the UNIQUE key columns in an insert row (LogRecord.FIELDS order)
+    KEY_COLUMNS = (0, 1, 2, 3, 6)
+    _key_of = staticmethod(itemgetter(*KEY_COLUMNS))
+
+    def __init__(self, horizon_seconds=3 * 24 * 3600, max_entries=300_000):
+        self.horizon_seconds = horizon_seconds
+        self.max_entries = max_entries
+        self._keys = OrderedDict() # fingerprint -> timestamp, oldest first
+        self._lock = threading.Lock() # The sync and monitor threads both insert
+        self.offered = 0
+        self.dropped = 0
+        self.insert_seconds = 0.0
+        self.inserted_rows = 0
+
+    @classmethod
+    def fingerprint(cls, row):
+        # Python's 64-bit tuple hash: collisions are ~1e-8 likely at full capacity,
+        # and cost nothing extra since string hashes are cached on the objects
+        return hash(cls._key_of(row))
+
+    def filter(self, rows):
+        """
+        Splits insert rows into the ones SQLite still has to see.
+
+        Returns:
+            tuple: (fresh_rows, fingerprints) - pass `fingerprints` to `remember`
+                   once the rows are committed.
+        """
+        cutoff = now_epoch() - self.horizon_seconds
+        keys = self._keys
+        fresh, fingerprints, seen_in_batch = [], [], set()
+        with self._lock:
+            for row in rows:
+                timestamp = row[0]
+                if timestamp is None or timestamp < cutoff:
+                    fresh.append(row)
+                    continue
+                key = self.fingerprint(row)
+                if key in keys or key in seen_in_batch:
+                    continue
+                seen_in_batch.add(key)
+                fresh.append(row)
+                fingerprints.append((key, timestamp))
+            self.offered += len(rows)
+            self.dropped += len(rows) - len(fresh)
+        return fresh, fingerprints
+
+    def remember(self, fingerprints):
+        """Records fingerprints of committed rows, evicting the oldest beyond capacity."""
+        keys = self._keys
+        cutoff = now_epoch() - self.horizon_seconds
+        with self._lock:
+            for key, timestamp in fingerprints:
+                keys[key] = timestamp
+            while keys:
+                oldest_key = next(iter(keys))
+                if len(keys) <= self.max_entries and keys[oldest_key] >= cutoff:
+                    break
+                keys.popitem(last=False)
+
+    def prime(self, conn):
+        """Loads the fingerprints of logs already stored inside the horizon."""
+        cursor = conn.execute(
+            "SELECT timestamp, logfile, source, event_id, NULL, NULL, message FROM logs "
+            "WHERE timestamp >= ? ORDER BY timestamp DESC LIMIT ?",
+            (now_epoch() - self.horizon_seconds, self.max_entries))
+        rows = cursor.fetchall()
+        self.remember((self.fingerprint(row), row[0]) for row in reversed(rows))
+        return len(rows)
+
+    def record_insert(self, seconds, rows):
+        """Feeds the measured cost of real inserts into the saved-time estimate."""
+        self.insert_seconds += seconds
+        self.inserted_rows += rows
+
+    def stats(self):
+        per_row = self.insert_seconds / self.inserted_rows if self.inserted_rows else 0.0
+        return {
+            "entries": len(self._keys),
+            "offered": self.offered,
+            "dropped": self.dropped,
+            "duplicate_rate": round(self.dropped / self.offered, 4) if self.offered else 0.0,
+            "saved_insert_seconds": round(self.dropped * per_row, 3)
+        }
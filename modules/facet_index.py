@@ -0,0 +1,89 @@
+# modules/facet_index.py
+
+from operator import attrgetter
+import numpy as np
+
+class FacetIndex:
+    """
+    Column-wise integer codes for the facets of a result set, so facet
+    filtering and live counts are NumPy mask and bincount operations instead
+    of Counters over the full list of logs.
+
+    Row `i` of every code array is `logs[i]` of the list the index was built
+    from; `prepend` keeps that true as the monitor adds new logs on top.
+    """
+    FACETS = ("event_id", "source", "severity", "event_type", "logfile")
+
+    def __init__(self, logs=()):
+        self.values = {facet: [] for facet in self.FACETS} # code -> value
+        self._codes_of = {facet: {} for facet in self.FACETS} # value -> code
+        self.codes = {facet: np.zeros(0, dtype=np.int32) for facet in self.FACETS}
+        self.prepend(logs)
+
+    def __len__(self):
+        return len(self.codes["logfile"])
+
+    def _encode(self, facet, logs):
+        try:
+            column = list(map(attrgetter(facet), logs))
+        except AttributeError: # Plain dicts, e.g. normalizer error entries
+            column = [log.get(facet) for log in logs]
+        codes_of, values = self._codes_of[facet], self.values[facet]
+        for value in set(column).difference(codes_of):
+            codes_of[value] = len(values)
+            values.append(value)
+        return np.fromiter(map(codes_of.__getitem__, column), dtype=np.int32, count=len(column))
+
+    def prepend(self, logs):
+        """Adds logs in front of the existing rows, matching `new_logs + old_logs`."""
+        if not logs:
+            return
+        for facet in self.FACETS:
+            self.codes[facet] = np.concatenate([self._encode(facet, logs), self.codes[facet]])
+
+    def _selection_masks(self, selections):
+        masks = {}
+        for facet, selected in selections.items():
+            if not selected:
+                continue
+            codes_of = self._codes_of[facet]
+            wanted = np.zeros(len(self.values[facet]) + 1, dtype=bool)
+            wanted[[codes_of[value] for value in selected if value in codes_of]] = True
+            masks[facet] = wanted[self.codes[facet]]
+        return masks
+
+    @staticmethod
+    def _combine(masks, size, skip=None):
+        combined = np.ones(size, dtype=bool)
+        for facet, mask in masks.items():
+            if facet != skip:
+                combined &= mask
+        return combined
+
+    def mask(self, selections):
+        """
+        Boolean row mask for `selections` ({facet: set of values}). Values within
+        a facet are OR'd, facets are AND'd.
+        """
+        return self._combine(self._selection_masks(selections), len(self))
+
+    def counts(self, facet, mask, top=None):
+        """(value, count) pairs of `facet` among the masked rows, most common first."""
+        totals = np.bincount(self.codes[facet][mask], minlength=len(self.values[facet]))
+        order = np.argsort(-totals, kind="stable")
+        if top is not None:
+            order = order[:top]
+        values = self.values[facet]
+        return [(values[code], int(totals[code])) for code in order if totals[code]]
+
+    def facet_counts(self, selections, top=20):
+        """
+        Live counts for every facet. Each facet is counted with the other
+        facets' selections applied but not its own, so sibling values stay
+        visible and can be added to the filter.
+        """
+        masks = self._selection_masks(selections)
+        full = self._combine(masks, len(self))
+        # Only facets with a selection of their own need a different mask
+        return {facet: self.counts(facet, self._combine(masks, len(self), skip=facet) if facet in masks else full, top)
+                for facet in self.FACETS}
@@ -0,0 +1,228 @@
+# modules/ingest_journal.py
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from modules.log_record import LogRecord
+from modules.metrics import metrics
+
+# Payload length, CRC32 of the payload, batch sequence number
+RECORD_HEADER = struct.Struct("<IIQ")
+
+class IngestJournal:
+    """
+    Append-only, memory-mapped journal of normalized batches, written before
+    they reach SQLite so a crash or close loses nothing the monitor has read.
+
+    Batches are appended to preallocated segment files as CRC-checked records
+    that also carry the monitor's bookmarks (`last_record_numbers`). Writes
+    land in the page cache via the mapping, so they survive a process crash at
+    once; `msync` + `fsync` are batched (every `sync_interval` seconds or
+    `sync_bytes`) to bound what a power loss can take.
+
+    The writer calls `mark_committed` once SQLite has a batch. Closed segments
+    whose batches are all committed are deleted; on startup `uncommitted()`
+    yields the rest for replay. Replays go through INSERT OR IGNORE against the
+    logs UNIQUE key, so a batch stored just before a crash is not duplicated.
+    """
+    def __init__(self, journal_dir="data/journal", segment_bytes=16 * 1024 * 1024,
+                 sync_interval=0.2, sync_bytes=4 * 1024 * 1024):
+        self.journal_dir = journal_dir
+        self.segment_bytes = segment_bytes
+        self.sync_interval = sync_interval
+        self.sync_bytes = sync_bytes
+        self._lock = threading.Lock()
+        self._file = self._map = None
+        self._segment_path = None
+        self._segment_last = 0
+        self._offset = 0
+        self._unsynced_bytes = 0
+        self._last_sync = time.perf_counter()
+        self._closed_segments = [] # [path, last sequence] of segments no longer appended to
+        self._committed_ahead = set() # Committed out of order (spilled batches), above the watermark
+        self._bookmarks_at = {} # sequence -> bookmarks, until committed
+        self.committed = 0 # Every batch up to this sequence is in SQLite
+        self.committed_bookmarks = {}
+        self.bookmarks = {} # As of the newest journaled batch
+        self.next_sequence = 1
+        os.makedirs(journal_dir, exist_ok=True)
+        self._recover()
+
+    # --- Recovery ---
+    def segment_paths(self):
+        return sorted(os.path.join(self.journal_dir, name) for name in os.listdir(self.journal_dir)
+                      if name.startswith("segment_") and name.endswith(".log"))
+
+    @staticmethod
+    def _read_records(path):
+        """Yields (sequence, payload) for each intact record; stops at the preallocated end or a torn tail."""
+        with open(path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            length, crc, sequence = RECORD_HEADER.unpack_from(data, offset)
+            end = offset + RECORD_HEADER.size + length
+            if length == 0 or end > len(data):
+                break
+            payload = data[offset + RECORD_HEADER.size:end]
+            if zlib.crc32(payload) != crc:
+                break
+            yield sequence, payload
+            offset = end
+
+    def _recover(self):
+        checkpoint_path = os.path.join(self.journal_dir, "checkpoint.json")
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            self.committed = checkpoint["committed"]
+            self.committed_bookmarks = checkpoint["bookmarks"]
+        self.bookmarks = dict(self.committed_bookmarks)
+        last_sequence, last_payload, found = self.committed, None, set()
+        for path in self.segment_paths():
+            segment_last = 0
+            for sequence, payload in self._read_records(path):
+                segment_last = sequence
+                if sequence > self.committed:
+                    found.add(sequence)
+                if sequence > last_sequence:
+                    last_sequence, last_payload = sequence, payload
+            self._closed_segments.append([path, segment_last])
+        # Sequences lost with a torn tail have nothing left to replay
+        self._committed_ahead = set(range(self.committed + 1, last_sequence + 1)) - found
+        if last_payload is not None:
+            self.bookmarks = json.loads(last_payload)[0]
+        self.next_sequence = last_sequence + 1
+        if found:
+            print(f"Journal: {len(found)} uncommitted batch(es) to replay.")
+        self._advance_watermark()
+
+    def uncommitted(self):
+        """Yields (sequence, logs) for every batch a previous session journaled but never committed."""
+        for path, _ in list(self._closed_segments):
+            for sequence, payload in self._read_records(path):
+                with self._lock:
+                    done = sequence <= self.committed or sequence in self._committed_ahead
+                if not done:
+                    bookmarks, rows = json.loads(payload)
+                    with self._lock:
+                        self._bookmarks_at[sequence] = bookmarks
+                    yield sequence, [LogRecord(*row) for row in rows]
+
+    # --- Appending ---
+    def append(self, logs, bookmarks=None):
+        """Journals a batch (and the monitor bookmarks reached with it); returns its sequence number."""
+        rows = [log.as_row() for log in logs if isinstance(log, LogRecord)]
+        with self._lock:
+            if bookmarks:
+                self.bookmarks.update(bookmarks)
+            payload = json.dumps([self.bookmarks, rows], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            sequence = self.next_sequence
+            self.next_sequence += 1
+            size = RECORD_HEADER.size + len(payload)
+            if self._map is None or self._offset + size > len(self._map):
+                self._rotate(sequence, size)
+            # Payload first, header last: a half-written record never has a valid header
+            start = self._offset + RECORD_HEADER.size
+            self._map[start:start + len(payload)] = payload
+            RECORD_HEADER.pack_into(self._map, self._offset, len(payload), zlib.crc32(payload), sequence)
+            self._offset += size
+            self._segment_last = sequence
+            self._bookmarks_at[sequence] = dict(self.bookmarks)
+            self._unsynced_bytes += size
+            if self._unsynced_bytes >= self.sync_bytes or time.perf_counter() - self._last_sync >= self.sync_interval:
+                self._sync()
+        metrics.incr("rows_journaled", len(rows))
+        return sequence
+
+    def sync(self):
+        """Flushes appended batches to disk now instead of waiting for the next batched sync."""
+        with self._lock:
+            if self._unsynced_bytes:
+                self._sync()
+
+    def _sync(self):
+        with metrics.stage("journal_sync"):
+            self._map.flush() # msync / FlushViewOfFile
+            os.fsync(self._file.fileno())
+        self._unsynced_bytes = 0
+        self._last_sync = time.perf_counter()
+
+    def _rotate(self, first_sequence, min_bytes):
+        self._close_segment()
+        path = os.path.join(self.journal_dir, f"segment_{first_sequence:012d}.log")
+        size = max(self.segment_bytes, min_bytes)
+        self._file = open(path, "w+b")
+        self._file.truncate(size) # Preallocated, so the mapping never has to grow
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._segment_path, self._offset = path, 0
+        metrics.incr("journal_segments")
+
+    def _close_segment(self):
+        if self._map is None:
+            return
+        if self._unsynced_bytes:
+            self._sync()
+        self._map.close()
+        self._file.truncate(self._offset) # Drop the unused preallocation
+        self._file.close()
+        self._closed_segments.append([self._segment_path, self._segment_last])
+        self._file = self._map = self._segment_path = None
+        self._retire()
+
+    # --- Committing ---
+    def mark_committed(self, sequence):
+        """Records that SQLite holds batch `sequence`; batches may be committed out of order."""
+        with self._lock:
+            if sequence > self.committed:
+                self._committed_ahead.add(sequence)
+            self._advance_watermark()
+
+    def _advance_watermark(self):
+        advanced = False
+        while self.committed + 1 in self._committed_ahead:
+            self.committed += 1
+            self._committed_ahead.discard(self.committed)
+            self.committed_bookmarks = self._bookmarks_at.pop(self.committed, self.committed_bookmarks)
+            advanced = True
+        if advanced:
+            self._retire()
+
+    def _retire(self):
+        """Deletes closed segments whose batches are all in SQLite, after checkpointing the watermark."""
+        retired = [path for path, last in self._closed_segments if last <= self.committed]
+        if not retired:
+            return
+        self._write_checkpoint()
+        for path in retired:
+            os.remove(path)
+        self._closed_segments = [entry for entry in self._closed_segments if entry[0] not in retired]
+
+    def _write_checkpoint(self):
+        # Written and renamed like users.json, so a crash leaves the old or the new checkpoint
+        path = os.path.join(self.journal_dir, "checkpoint.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"committed": self.committed, "bookmarks": self.committed_bookmarks}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    def checkpoint(self):
+        """Saves the commit watermark without closing; used when the writer did not stop in time."""
+        with self._lock:
+            if self._unsynced_bytes:
+                self._sync()
+            self._write_checkpoint()
+
+    def latest_bookmarks(self):
+        with self._lock:
+            return dict(self.bookmarks)
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+            self._write_checkpoint()
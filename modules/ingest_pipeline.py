@@ -0,0 +1,253 @@
+# modules/ingest_pipeline.py
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from modules.log_record import LogRecord
+from modules.metrics import metrics
+
+class IngestPipeline:
+    """
+    Decouples the event log reader from the database and the alert engines:
+
+        reader --submit()--> bounded queue --> writer thread --> detector thread
+
+    The reader only ever hands over a batch, so a slow insert or rule pass no
+    longer delays the next read. When the queue is full the backpressure
+    policy decides what happens to a new batch:
+
+      - "block": the reader waits for room (nothing is lost, reading stalls).
+      - "spill": the batch is written to a spool file on disk and replayed by
+        the writer once the queue has drained.
+      - "drop":  low-severity logs (`drop_severities`) are discarded and the
+        rest wait for room, so warnings and errors are never lost.
+
+    With a `journal` (IngestJournal), every batch is journaled before it is
+    queued and marked committed once stored; batches a crash left behind are
+    replayed by the writer before anything new.
+    """
+    POLICIES = ("block", "spill", "drop")
+
+    def __init__(self, db_handler, detect_callback, policy="spill", max_batches=32,
+                 spool_dir="data/spool", drop_severities=("Info",), journal=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown backpressure policy '{policy}', expected one of {self.POLICIES}")
+        self.db_handler = db_handler
+        self.detect_callback = detect_callback
+        self.policy = policy
+        self.spool_dir = spool_dir
+        self.drop_severities = set(drop_severities)
+        self.journal = journal
+        self._queue = queue.Queue(maxsize=max_batches)
+        self._detect_lock = threading.Lock()
+        self._detect_ready = threading.Event()
+        self._pending_logs = [] # Written but not yet seen by the detector
+        self._pending_counts = Counter()
+        self._spool_sequence = 0
+        self.running = False
+        self._writer_thread = None
+        self._detector_thread = None
+
+    # --- Reader side ---
+    def submit(self, logs, counts=None, bookmarks=None):
+        """
+        Hands a batch from the reader to the pipeline; returns once it is queued,
+        spilled or dropped. `bookmarks` are the reader's positions after this batch.
+        """
+        sequence = None
+        if self.journal is not None and (logs or bookmarks):
+            with metrics.stage("journal_append"):
+                sequence = self.journal.append(logs, bookmarks)
+        if not logs:
+            if sequence is not None:
+                self.journal.mark_committed(sequence) # Only moved the bookmarks
+            return
+        counts = dict(counts or {})
+        try:
+            self._queue.put_nowait((logs, counts, sequence))
+        except queue.Full:
+            self._on_full(logs, counts, sequence)
+        metrics.set_gauge("pipeline_queue_depth", self._queue.qsize())
+
+    def bookmarks(self):
+        """Reader positions to resume from: those of the last journaled batch, if any."""
+        return self.journal.latest_bookmarks() if self.journal is not None else {}
+
+    def _on_full(self, logs, counts, sequence):
+        if self.policy == "spill":
+            self._spill(logs, sequence)
+            return
+        if self.policy == "drop":
+            kept = [log for log in logs if log.get("severity") not in self.drop_severities]
+            metrics.incr("rows_dropped", len(logs) - len(kept))
+            if not kept:
+                return
+            counts = Counter(log.get("logfile") for log in kept)
+            logs = kept
+        start = time.perf_counter()
+        self._queue.put((logs, counts, sequence))
+        metrics.observe("pipeline_blocked", time.perf_counter() - start)
+
+    def _spill(self, logs, sequence=None):
+        self._spill_batches(logs, [sequence])
+
+    def _spill_batches(self, logs, sequences):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        rows = [log.as_row() for log in logs if isinstance(log, LogRecord)]
+        sequences = [sequence for sequence in sequences if sequence is not None]
+        # An optional first line ties the file to its journal batches
+        header = [json.dumps({"journal_sequences": sequences}) + "\n"] if sequences else []
+        self._spool_sequence += 1
+        # Sortable names so replay keeps arrival order
+        name = f"spool_{time.time_ns()}_{self._spool_sequence:06d}.jsonl"
+        part_path = os.path.join(self.spool_dir, name + ".part")
+        with open(part_path, "w", encoding="utf-8") as f:
+            f.writelines(header)
+            f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        os.replace(part_path, os.path.join(self.spool_dir, name))
+        metrics.incr("rows_spilled", len(rows))
+
+    def spooled_files(self):
+        if not os.path.isdir(self.spool_dir):
+            return []
+        return sorted(os.path.join(self.spool_dir, name) for name in os.listdir(self.spool_dir) if name.endswith(".jsonl"))
+
+    # --- Writer ---
+    def _writer_loop(self):
+        self._replay_journal()
+        while self.running or not self._queue.empty():
+            try:
+                logs, counts, sequence = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self.journal is not None:
+                    self.journal.sync() # Idle: no reason to wait for the next batched sync
+                # Load has subsided: replay spooled batches until new work arrives
+                while self._queue.empty() and self._replay_one():
+                    pass
+                continue
+            metrics.set_gauge("pipeline_queue_depth", self._queue.qsize())
+            if self._write(logs, [sequence]):
+                self._hand_to_detector(logs, counts)
+
+    def _write(self, logs, sequences, spill_on_failure=True):
+        """
+        Inserts a batch and marks its journal sequences committed. A failed insert is
+        spilled with its sequences, so it is retried once the writer is idle and the
+        journal watermark can move on after it. Returns True when stored.
+        """
+        with metrics.stage("pipeline_write"):
+            stored = self.db_handler.insert_logs(logs)
+        if not stored:
+            metrics.incr("pipeline_write_failures")
+            if spill_on_failure:
+                self._spill_batches(logs, sequences)
+            return False
+        if self.journal is not None:
+            for sequence in sequences:
+                if sequence is not None:
+                    self.journal.mark_committed(sequence)
+        return True
+
+    def _replay_journal(self, max_rows=50_000):
+        """Stores batches journaled by a previous session that never reached SQLite, coalesced into large inserts."""
+        if self.journal is None:
+            return
+        logs, sequences = [], []
+        for sequence, batch in self.journal.uncommitted():
+            logs += batch
+            sequences.append(sequence)
+            if len(logs) >= max_rows:
+                self._write_recovered(logs, sequences)
+                logs, sequences = [], []
+        if sequences:
+            self._write_recovered(logs, sequences)
+
+    def _write_recovered(self, logs, sequences):
+        if not self._write(logs, sequences):
+            return
+        metrics.incr("rows_recovered", len(logs))
+        if logs:
+            self._hand_to_detector(logs, Counter(log.logfile for log in logs))
+
+    def _replay_one(self):
+        files = self.spooled_files()
+        if not files:
+            return False
+        path = files[0]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            sequences = rows.pop(0).get("journal_sequences", []) if rows and isinstance(rows[0], dict) else []
+            logs = [LogRecord(*row) for row in rows]
+        except (OSError, ValueError, TypeError) as e:
+            # Set aside rather than retried forever; the file is kept for inspection
+            print(f"Could not replay spool file {path}: {e}")
+            os.replace(path, path + ".bad")
+            return False
+        counts = Counter(log.logfile for log in logs)
+        if not self._write(logs, sequences, spill_on_failure=False):
+            return False # Kept and retried the next time the writer is idle
+        # Only removed once stored; a crash before this replays it again and the UNIQUE key de-duplicates
+        os.remove(path)
+        metrics.incr("rows_replayed", len(logs))
+        self._hand_to_detector(logs, counts)
+        return True
+
+    # --- Detector ---
+    def _hand_to_detector(self, logs, counts):
+        with self._detect_lock:
+            self._pending_logs = logs + self._pending_logs
+            self._pending_counts.update(counts)
+        self._detect_ready.set()
+
+    def _detector_loop(self):
+        # Keeps going until the writer has drained and its last batch has been checked
+        while self.running or self._writer_thread.is_alive() or self._detect_ready.is_set():
+            if not self._detect_ready.wait(timeout=0.5):
+                continue
+            with self._detect_lock:
+                # Batches written while the last rule pass ran are checked together
+                logs, counts = self._pending_logs, self._pending_counts
+                self._pending_logs, self._pending_counts = [], Counter()
+                self._detect_ready.clear()
+            metrics.set_gauge("detector_batch_size", len(logs))
+            try:
+                self.detect_callback(logs, counts)
+            except Exception as e:
+                print(f"Detector callback failed: {e}")
+
+    def wait_until_idle(self, timeout=None):
+        """Blocks until the queue is empty and the spool has been replayed. Returns False on timeout."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while not self._queue.empty() or self.spooled_files():
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    # --- Lifecycle ---
+    def start(self):
+        if self.running: return
+        self.running = True
+        self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._detector_thread = threading.Thread(target=self._detector_loop, daemon=True)
+        self._writer_thread.start()
+        self._detector_thread.start()
+
+    def stop(self, timeout=10):
+        """Stops after draining the queue; anything still spooled is replayed on the next start."""
+        self.running = False
+        for thread in (self._writer_thread, self._detector_thread):
+            if thread is not None:
+                thread.join(timeout)
+        if self.journal is None:
+            return
+        if self._writer_thread and self._writer_thread.is_alive():
+            # Still inside an insert: keep the segment open for it, but record what is committed so far
+            print(f"Ingest writer still busy after {timeout}s; the rest is replayed from the journal on the next start.")
+            self.journal.checkpoint()
+        else:
+            self.journal.close()
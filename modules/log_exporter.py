@@ -0,0 +1,107 @@
+# modules/log_exporter.py
+
+import csv
+import gzip
+import json
+import os
+import threading
+import time
+from modules.log_record import LogRecord
+from modules.metrics import metrics
+from modules.time_utils import format_epoch
+
+class LogExporter:
+    """
+    Streams query results straight from a database cursor to CSV, gzip'd CSV or
+    JSONL, so exports of any size run in bounded memory on a background thread.
+    """
+    HEADERS = list(LogRecord.FIELDS)
+
+    def __init__(self, db_handler, batch_size=5000):
+        self.db_handler = db_handler
+        self.batch_size = batch_size
+
+    @staticmethod
+    def detect_format(filepath):
+        """Picks the output format from the file extension."""
+        lower = filepath.lower()
+        if lower.endswith(".jsonl") or lower.endswith(".jsonl.gz"):
+            return "jsonl"
+        return "csv"
+
+    @staticmethod
+    def _open(path, compress):
+        if compress:
+            return gzip.open(path, "wt", newline="", encoding="utf-8", compresslevel=6)
+        return open(path, "w", newline="", encoding="utf-8")
+
+    def export(self, filepath, filters=None, progress_callback=None, cancel_event=None):
+        """
+        Writes every log matching `filters` (the keyword arguments of
+        DatabaseHandler.iter_logs) to `filepath`.
+
+        The file is written to `<filepath>.part` and only renamed into place once
+        complete, so a cancelled or failed export never leaves a truncated file.
+
+        Returns:
+            tuple: (rows_written, completed)
+        """
+        filters = filters or {}
+        fmt = self.detect_format(filepath)
+        # Counting a LIKE filter costs a second full scan, so progress is open-ended there
+        total = None if filters.get("keyword") else self.db_handler.count_logs(**filters)
+        part_path = filepath + ".part"
+        rows_written = 0
+        start = time.perf_counter()
+        try:
+            with self._open(part_path, filepath.lower().endswith(".gz")) as f:
+                if fmt == "csv":
+                    writer = csv.writer(f)
+                    writer.writerow(self.HEADERS)
+                for rows in self.db_handler.iter_logs(batch_size=self.batch_size, **filters):
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    # Exports carry local wall-clock time, like the archives always have
+                    rows = [(format_epoch(row[0]),) + row[1:] for row in rows]
+                    if fmt == "csv":
+                        writer.writerows(rows)
+                    else:
+                        f.writelines(json.dumps(dict(zip(self.HEADERS, row)), ensure_ascii=False) + "\n" for row in rows)
+                    rows_written += len(rows)
+                    if progress_callback:
+                        progress_callback(rows_written, total)
+            if cancel_event is not None and cancel_event.is_set():
+                os.remove(part_path)
+                print(f"Export cancelled after {rows_written} rows.")
+                return rows_written, False
+            os.replace(part_path, filepath)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        seconds = time.perf_counter() - start
+        metrics.observe("export", seconds)
+        metrics.incr("rows_exported", rows_written)
+        print(f"Exported {rows_written} logs to {filepath} in {seconds:.1f}s.")
+        return rows_written, True
+
+    def start_export(self, filepath, filters, progress_callback, done_callback):
+        """
+        Runs `export` on a daemon thread. `done_callback(rows_written, completed, error)`
+        is called from that thread when it finishes.
+
+        Returns:
+            threading.Event: set it to cancel the export.
+        """
+        cancel_event = threading.Event()
+
+        def _run():
+            try:
+                rows_written, completed = self.export(filepath, filters, progress_callback, cancel_event)
+                done_callback(rows_written, completed, None)
+            except Exception as e:
+                print(f"Export failed: {e}")
+                done_callback(0, False, e)
+
+        threading.Thread(target=_run, daemon=True).start()
+        return cancel_event
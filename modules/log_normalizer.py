@@ -1,6 +1,8 @@
 # modules/log_normalizer.py
 
 from datetime import datetime
+from modules.log_record import LogRecord
+from modules.time_utils import now_epoch, to_epoch
 
 class LogNormalizer:
     SEVERITY_KEYWORDS = {
@@ -21,41 +23,49 @@ class LogNormalizer:
 
     def _normalize_windows_log(self, log):
         try:
+            # TimeGenerated is a naive local datetime; store it as UTC epoch seconds
             timestamp = log.get("TimeGenerated")
             if isinstance(timestamp, datetime):
-                timestamp = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+                timestamp = int(timestamp.timestamp())
+            else:
+                timestamp = to_epoch(timestamp)
 
             event_type = self.EVENT_TYPE_MAP.get(str(log.get("EventType")), "Unknown")
             message = log.get("Message", "")
             severity = self._determine_severity(message, event_type)
 
-            return {
-                "timestamp": timestamp,
-                "logfile": log.get("logfile", "Unknown"),
-                "source": log.get("SourceName", "Unknown"),
-                "event_id": str(log.get("EventID", "")),
-                "event_type": event_type,
-                "severity": severity,
-                "message": message,
-                "raw_log": log
-            }
+            # The raw event is not kept: nothing downstream reads it once normalized
+            return LogRecord(
+                timestamp,
+                log.get("logfile", "Unknown"),
+                log.get("SourceName", "Unknown"),
+                str(log.get("EventID", "")),
+                event_type,
+                severity,
+                message
+            )
         except Exception as e:
             return {"error": f"Normalization failed: {e}", "raw_log": log}
 
     def _normalize_generic_log(self, log):
         try:
             message = log.get("message") or log.get("msg") or str(log)
-            severity = self._determine_severity(message)
-            return {
-                "timestamp": log.get("timestamp") or datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
-                "logfile": log.get("logfile", "Generic"),
-                "source": log.get("source", "Generic"),
-                "event_id": str(log.get("event_id", "N/A")),
-                "event_type": log.get("event_type", "Unknown"),
-                "severity": severity,
-                "message": message,
-                "raw_log": log
-            }
+            # Re-imported SecLog archives/exports already carry a severity
+            severity = log.get("severity") or self._determine_severity(message)
+            timestamp = to_epoch(log.get("timestamp"))
+            if timestamp is None:
+                if log.get("timestamp"):
+                    return {"error": f"Unrecognized timestamp: {log.get('timestamp')!r}", "raw_log": log}
+                timestamp = now_epoch()
+            return LogRecord(
+                timestamp,
+                log.get("logfile", "Generic"),
+                log.get("source", "Generic"),
+                str(log.get("event_id", "N/A")),
+                log.get("event_type", "Unknown"),
+                severity,
+                message
+            )
         except Exception as e:
             return {"error": f"Generic normalization failed: {e}", "raw_log": log}
 
@@ -0,0 +1,69 @@
+# modules/log_record.py
+
+# One shared object per distinct categorical value; dict.setdefault is cheaper than
+# sys.intern behind a helper and also tolerates None from NULL columns
+_interned = {}
+_intern = _interned.setdefault
+
+class LogRecord:
+    """
+    A compact, slotted log event used from the normalizer through the database
+    writer to the UI. Low-cardinality strings are interned so millions of records
+    share a handful of `logfile`/`source`/`event_type`/`severity` objects.
+
+    `timestamp` is integer UTC epoch seconds; see modules.time_utils for display.
+
+    Supports the small dict-style surface (`get`, `[]`, `in`, `keys`) the UI and
+    export code already rely on.
+    """
+    __slots__ = ("timestamp", "logfile", "source", "event_id", "event_type", "severity", "message", "id")
+    FIELDS = ("timestamp", "logfile", "source", "event_id", "event_type", "severity", "message")
+
+    def __init__(self, timestamp, logfile, source, event_id, event_type, severity, message, id=None):
+        self.timestamp = timestamp
+        self.logfile = _intern(logfile, logfile)
+        self.source = _intern(source, source)
+        self.event_id = _intern(event_id, event_id)
+        self.event_type = _intern(event_type, event_type)
+        self.severity = _intern(severity, severity)
+        self.message = message
+        self.id = id
+
+    def as_row(self):
+        """Returns the values in `FIELDS` order, ready for an INSERT."""
+        return (self.timestamp, self.logfile, self.source, self.event_id, self.event_type, self.severity, self.message)
+
+    def as_dict(self):
+        record = {field: getattr(self, field) for field in self.FIELDS}
+        if self.id is not None:
+            record["id"] = self.id
+        return record
+
+    # --- Dict-style access ---
+    def get(self, key, default=None):
+        if key in self.__slots__:
+            value = getattr(self, key)
+            return default if value is None and key == "id" else value
+        return default
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.FIELDS or (key == "id" and self.id is not None)
+
+    def keys(self):
+        return self.as_dict().keys()
+
+    def __eq__(self, other):
+        if not isinstance(other, LogRecord):
+            return NotImplemented
+        return self.as_row() == other.as_row()
+
+    def __hash__(self):
+        return hash(self.as_row())
+
+    def __repr__(self):
+        return f"LogRecord({self.timestamp!r}, {self.logfile!r}, {self.source!r}, event_id={self.event_id!r})"
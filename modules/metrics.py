@@ -0,0 +1,237 @@
+# modules/metrics.py
+
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+
+class LatencyHistogram:
+    """A fixed-bucket latency histogram (in milliseconds) with running totals."""
+    BUCKETS_MS = (0.05, 0.1, 0.5, 1, 5, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.samples = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect_left(self.BUCKETS_MS, ms)] += 1
+        self.samples += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, pct):
+        """Returns the upper bound of the bucket holding the given percentile."""
+        if not self.samples:
+            return 0.0
+        target = self.samples * pct / 100.0
+        running = 0
+        for i, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return min(self.BUCKETS_MS[i], self.max_ms) if i < len(self.BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self):
+        buckets = {f"<={b}ms": c for b, c in zip(self.BUCKETS_MS, self.counts)}
+        buckets[f">{self.BUCKETS_MS[-1]}ms"] = self.counts[-1]
+        return {
+            "samples": self.samples,
+            "avg_ms": round(self.total_ms / self.samples, 3) if self.samples else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": buckets
+        }
+
+class PipelineMetrics:
+    """
+    Collects per-stage latencies, counters, gauges and cache statistics for the
+    detection pipeline, and can dump them to a JSON file on a fixed interval.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.histograms = {}
+        self.counters = Counter()
+        self.gauges = {}
+        self._last_rate_sample = (time.time(), Counter())
+        self.profiling_stages = set()
+        # cProfile cannot share a profiler between threads, so each thread gets its own per stage
+        self._profilers = {} # (thread ident, stage) -> cProfile.Profile
+        self._active_profilers = set() # Enabled right now; never snapshotted while enabled
+        self._profile_lock = threading.Lock() # Serializes enable/disable against the dump
+        self._thread_state = threading.local() # .profiler: the one enabled on this thread, if any
+        self._dump_thread = None
+        self._dump_stop = threading.Event()
+
+    # --- Recording ---
+    def observe(self, stage, seconds):
+        """Records one latency sample (in seconds) for a pipeline stage."""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            histogram.observe(seconds * 1000.0)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times the enclosed block as one sample of `name`, profiling it if enabled.
+        A stage nested in a profiled one shows up in the outer stage's profile.
+        """
+        profiler = None
+        if name in self.profiling_stages and getattr(self._thread_state, "profiler", None) is None:
+            profiler = self._start_profiler(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+            if profiler is not None:
+                self._stop_profiler(profiler)
+
+    def incr(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    def set_gauge(self, gauge, value):
+        with self._lock:
+            self.gauges[gauge] = value
+
+    def record_cache(self, cache_name, hit):
+        """Counts a hit or a miss for the named cache."""
+        self.incr(f"{cache_name}_hits" if hit else f"{cache_name}_misses")
+
+    # --- Profiling ---
+    def enable_profiling(self, stages):
+        """Enables cProfile for the given stage names (pass a set, list or comma-separated string)."""
+        if isinstance(stages, str):
+            stages = [s.strip() for s in stages.split(",") if s.strip()]
+        with self._lock:
+            self.profiling_stages.update(stages)
+        print(f"Profiling enabled for stages: {', '.join(sorted(self.profiling_stages))}")
+
+    def disable_profiling(self):
+        with self._lock:
+            self.profiling_stages.clear()
+
+    def _start_profiler(self, name):
+        key = (threading.get_ident(), name)
+        with self._profile_lock:
+            profiler = self._profilers.get(key)
+            if profiler is None:
+                profiler = self._profilers[key] = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                return None # Another profiling tool is active (Python 3.12+ allows only one)
+            self._active_profilers.add(profiler)
+        self._thread_state.profiler = profiler
+        return profiler
+
+    def _stop_profiler(self, profiler):
+        with self._profile_lock:
+            profiler.disable()
+            self._active_profilers.discard(profiler)
+        self._thread_state.profiler = None
+
+    def _write_profiles(self, directory):
+        """Writes one profile per stage, merged across threads; profilers enabled right now wait for the next dump."""
+        merged = {}
+        with self._profile_lock:
+            for (_, name), profiler in self._profilers.items():
+                if profiler in self._active_profilers:
+                    continue
+                stats = pstats.Stats(profiler)
+                if name in merged:
+                    merged[name].add(stats)
+                else:
+                    merged[name] = stats
+        for name, stats in merged.items():
+            if not stats.stats:
+                continue # Nothing collected yet
+            stats.dump_stats(os.path.join(directory, f"profile_{name}.prof"))
+            with open(os.path.join(directory, f"profile_{name}.txt"), "w") as f:
+                stats.stream = f
+                stats.sort_stats("cumulative").print_stats(30)
+
+    # --- Reporting ---
+    def snapshot(self):
+        """Returns a JSON-serializable view of every metric collected so far."""
+        now = time.time()
+        with self._lock:
+            counters = Counter(self.counters)
+            last_time, last_counters = self._last_rate_sample
+            self._last_rate_sample = (now, counters)
+            stages = {name: hist.to_dict() for name, hist in self.histograms.items()}
+            gauges = dict(self.gauges)
+
+        uptime = max(now - self.started_at, 1e-9)
+        interval = max(now - last_time, 1e-9)
+        rates = {}
+        for name, value in counters.items():
+            if name.startswith("rows_"):
+                rates[name] = {
+                    "per_sec_overall": round(value / uptime, 2),
+                    "per_sec_recent": round((value - last_counters.get(name, 0)) / interval, 2)
+                }
+        caches = {}
+        for name in counters:
+            if name.endswith("_hits") or name.endswith("_misses"):
+                cache = name.rsplit("_", 1)[0]
+                hits, misses = counters.get(f"{cache}_hits", 0), counters.get(f"{cache}_misses", 0)
+                caches[cache] = {
+                    "hits": hits, "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0
+                }
+        return {
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)),
+            "uptime_seconds": round(uptime, 1),
+            "stages": stages,
+            "counters": dict(counters),
+            "gauges": gauges,
+            "rates": rates,
+            "caches": caches
+        }
+
+    def dump(self, filepath):
+        """Writes the current snapshot (and any profiler output) next to `filepath`."""
+        directory = os.path.dirname(filepath) or "."
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, filepath)
+        if self.profiling_stages:
+            self._write_profiles(directory)
+
+    def start_periodic_dump(self, filepath="data/metrics/metrics.json", interval_seconds=30):
+        """Starts a daemon thread that dumps the metrics every `interval_seconds`."""
+        if self._dump_thread and self._dump_thread.is_alive():
+            return
+        self._dump_stop.clear()
+
+        def _loop():
+            while not self._dump_stop.wait(interval_seconds):
+                try:
+                    self.dump(filepath)
+                except OSError as e:
+                    print(f"Failed to write metrics dump: {e}")
+
+        self._dump_thread = threading.Thread(target=_loop, daemon=True)
+        self._dump_thread.start()
+
+    def stop_periodic_dump(self):
+        self._dump_stop.set()
+
+# Shared instance used by every pipeline stage
+metrics = PipelineMetrics()
@@ -0,0 +1,89 @@
+# modules/query_cache.py
+
+import threading
+from collections import OrderedDict
+from modules.metrics import metrics
+
+class QueryCache:
+    """
+    A small LRU cache of `query_logs` results keyed by the normalized sidebar
+    filters. Every entry is tagged with the database write generation it was
+    read at and is only served while that generation is still current.
+
+    When new logs are written, entries whose time range ends before the
+    oldest written timestamp are carried over to the new generation, so
+    queries over days that are already over stay cached while logs stream in.
+    """
+    def __init__(self, max_entries=8, max_rows=200_000):
+        self.max_entries = max_entries
+        # Total rows held across all entries: at ~575 bytes per LogRecord about 115 MB,
+        # less while the UI holds the same records; larger results are not cached
+        self.max_rows = max_rows
+        self.generation = 0
+        self._entries = OrderedDict() # key -> (generation, end_bound, results, counts)
+        self._rows = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(log_sources=None, start_date=None, end_date=None, keyword=None, start_time=None, end_time=None):
+        """Normalizes filter arguments so equivalent sidebar selections share an entry."""
+        if not log_sources or "All" in log_sources:
+            sources = None
+        else:
+            sources = tuple(sorted(set(log_sources)))
+        return (sources, start_date or None, end_date or None, keyword or None, start_time, end_time)
+
+    def get(self, key):
+        """Returns (results, counts) or None. Callers get their own list and Counter."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != self.generation:
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        metrics.record_cache("query_cache", entry is not None)
+        if entry is None:
+            return None
+        return list(entry[2]), entry[3].copy()
+
+    def put(self, key, generation, end_bound, results, counts):
+        """
+        Stores a result read at `generation`. `end_bound` is the exclusive upper
+        timestamp of the query's range, or None if it is open-ended.
+        """
+        if len(results) > self.max_rows:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return # A write landed while the query ran
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (generation, end_bound, list(results), counts.copy())
+            self._rows += len(results)
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                self._drop(next(iter(self._entries)))
+            metrics.set_gauge("query_cache_rows", self._rows)
+
+    def on_write(self, generation, oldest_timestamp=None):
+        """
+        Moves to the database's new write `generation`. Entries whose range ends
+        at or before `oldest_timestamp` cannot see the new rows and stay valid;
+        pass None (e.g. after deletes) to invalidate everything.
+        """
+        with self._lock:
+            self.generation = generation
+            for key, (_, end_bound, results, counts) in list(self._entries.items()):
+                if oldest_timestamp is not None and end_bound is not None and end_bound <= oldest_timestamp:
+                    self._entries[key] = (self.generation, end_bound, results, counts)
+                else:
+                    self._drop(key)
+            metrics.set_gauge("query_cache_rows", self._rows)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+
+    def _drop(self, key):
+        self._rows -= len(self._entries.pop(key)[2])
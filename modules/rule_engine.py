@@ -1,7 +1,7 @@
 # modules/rule_engine.py
 
 import json
-from datetime import datetime, timedelta
+from modules.time_utils import format_epoch, now_epoch
 
 class RuleEngine:
     """
@@ -32,9 +32,11 @@ class RuleEngine:
             print(f"Error: Could not decode JSON from '{filepath}'. Check for syntax errors.")
             return []
 
-    def check_alerts(self):
+    def check_alerts(self, end_time=None):
         """
         Iterates through all enabled simple rules and checks them against the database.
+        Rules are evaluated over the window ending now, or at `end_time` (epoch
+        seconds) when re-checking historical data.
         Returns a list of triggered alerts.
         """
         if not self.db_handler:
@@ -42,18 +44,18 @@ class RuleEngine:
             return []
         
         triggered_alerts = []
+        # Every rule in this cycle is evaluated against the same instant
+        evaluation_time = end_time if end_time is not None else now_epoch()
 
         for rule in self.rules:
             time_window = rule["aggregation"]["time_window_minutes"]
             threshold = rule["aggregation"]["threshold"]
             
-            start_time = datetime.now() - timedelta(minutes=time_window)
-            start_time_str = start_time.strftime("%Y-%m-%d %H:%M:%S")
-
             log_count = self.db_handler.count_logs_for_rule(
                 logfile=rule["logfile"],
                 conditions=rule["conditions"],
-                start_time=start_time_str
+                start_time=evaluation_time - time_window * 60,
+                end_time=end_time
             )
 
             # This print statement is removed from the final version for cleaner output,
@@ -61,13 +63,21 @@ class RuleEngine:
             # print(f"Checking rule '{rule['rule_name']}': Found {log_count} matching logs (Threshold: {threshold})")
 
             if log_count >= threshold:
+                # Evidence is looked up once, when the rule fires, and linked to any incident made from it
+                log_ids = self.db_handler.rule_log_ids(
+                    logfile=rule["logfile"],
+                    conditions=rule["conditions"],
+                    start_time=evaluation_time - time_window * 60,
+                    end_time=end_time
+                )
                 alert = {
                     "rule_name": rule["rule_name"],
                     "description": rule["description"],
-                    "trigger_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "trigger_time": format_epoch(evaluation_time),
                     "count": log_count,
                     "threshold": threshold,
-                    "time_window_minutes": time_window
+                    "time_window_minutes": time_window,
+                    "log_ids": log_ids
                 }
                 triggered_alerts.append(alert)
         
@@ -0,0 +1,103 @@
+# modules/synthetic_events.py
+
+import random
+from datetime import datetime, timedelta
+
+class SyntheticEventGenerator:
+    """
+    Generates reproducible, Windows-event-shaped records (the same raw dicts that
+    LogHandler builds from win32evtlog) for benchmarks and load testing.
+    """
+    # Default mix of event IDs, weighted by how often they appear in a busy domain host
+    DEFAULT_MIX = {4624: 0.55, 4625: 0.25, 4740: 0.02, 1102: 0.005, 11707: 0.03, 7036: 0.145}
+
+    TEMPLATES = {
+        4624: ("Security", "Microsoft-Windows-Security-Auditing", 8,
+               "An account was successfully logged on.\n\nSubject:\n\tSecurity ID:\tSYSTEM\n\tAccount Name:\t{host}$\n\n"
+               "Logon Type:\t{logon_type}\n\nNew Logon:\n\tAccount Name:\t{user}\n\tAccount Domain:\tCORP\n\n"
+               "Network Information:\n\tWorkstation Name:\t{host}\n\tSource Network Address:\t{ip}\n\tSource Port:\t{port}"),
+        4625: ("Security", "Microsoft-Windows-Security-Auditing", 16,
+               "An account failed to log on.\n\nAccount For Which Logon Failed:\n\tAccount Name:\t{user}\n\tAccount Domain:\tCORP\n\n"
+               "Failure Information:\n\tFailure Reason:\tUnknown user name or bad password.\n\tStatus:\t0xC000006D\n\n"
+               "Network Information:\n\tWorkstation Name:\t{host}\n\tSource Network Address:\t{ip}\n\tSource Port:\t{port}"),
+        4740: ("Security", "Microsoft-Windows-Security-Auditing", 8,
+               "A user account was locked out.\n\nAccount That Was Locked Out:\n\tAccount Name:\t{user}\n\n"
+               "Additional Information:\n\tCaller Computer Name:\t{host}"),
+        1102: ("Security", "Microsoft-Windows-Eventlog", 8,
+               "The audit log was cleared.\nSubject:\n\tAccount Name:\t{user}\n\tDomain Name:\tCORP"),
+        11707: ("Application", "MsiInstaller", 4,
+                "Product: {product} -- Installation completed successfully."),
+        7036: ("System", "Service Control Manager", 4,
+               "The {service} service entered the {state} state."),
+    }
+
+    USERS = ["alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi", "svc_backup", "administrator"]
+    HOSTS = ["WS-0142", "WS-0177", "SRV-DC01", "SRV-FILE02", "LAPTOP-7Q3K"]
+    PRODUCTS = ["7-Zip 23.01 (x64)", "Google Chrome", "Microsoft Visual C++ 2022 Redistributable", "Notepad++"]
+    SERVICES = ["Windows Update", "Print Spooler", "BITS", "WinHTTP Web Proxy Auto-Discovery Service"]
+
+    def __init__(self, seed=42, mix=None, burst_probability=0.002, burst_size=(5, 40),
+                 long_message_ratio=0.01, long_message_bytes=4096):
+        self.rng = random.Random(seed)
+        mix = mix or self.DEFAULT_MIX
+        self.event_ids = list(mix.keys())
+        self.weights = list(mix.values())
+        self.burst_probability = burst_probability
+        self.burst_size = burst_size
+        self.long_message_ratio = long_message_ratio
+        self.long_message_bytes = long_message_bytes
+
+    def _message(self, event_id, user=None, ip=None):
+        rng = self.rng
+        text = self.TEMPLATES[event_id][3].format(
+            user=user or rng.choice(self.USERS), host=rng.choice(self.HOSTS),
+            ip=ip or f"10.{rng.randint(0, 20)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            port=rng.randint(1024, 65535), logon_type=rng.choice((2, 3, 10)),
+            product=rng.choice(self.PRODUCTS), service=rng.choice(self.SERVICES),
+            state=rng.choice(("running", "stopped"))
+        )
+        if rng.random() < self.long_message_ratio:
+            # Long bodies (e.g. PowerShell script block logging) stress message storage and LIKE scans
+            filler = "Additional Context: " + "x" * max(0, self.long_message_bytes - len(text))
+            text = f"{text}\n{filler}"
+        return text
+
+    def _record(self, event_id, when, user=None, ip=None):
+        logfile, source, event_type, _ = self.TEMPLATES[event_id]
+        return {
+            "TimeGenerated": when, "SourceName": source,
+            "EventID": event_id, "EventType": event_type,
+            "Message": self._message(event_id, user, ip), "logfile": logfile
+        }
+
+    def generate(self, count, end_time=None, span_minutes=7 * 24 * 60):
+        """
+        Yields `count` raw event dicts in ascending time order, spread over `span_minutes`
+        ending at `end_time`. Brute-force bursts (a run of 4625s for one account from one
+        address, usually followed by a 4624) are injected with `burst_probability`.
+        """
+        rng = self.rng
+        end_time = end_time or datetime.now().replace(microsecond=0)
+        start_time = end_time - timedelta(minutes=span_minutes)
+        step = (span_minutes * 60.0) / max(count, 1)
+        offset = 0.0
+        produced = 0
+        while produced < count:
+            when = start_time + timedelta(seconds=int(offset))
+            if rng.random() < self.burst_probability:
+                user = rng.choice(self.USERS)
+                ip = f"203.0.113.{rng.randint(1, 254)}"
+                for _ in range(min(rng.randint(*self.burst_size), count - produced)):
+                    yield self._record(4625, when, user, ip)
+                    produced += 1
+                    offset += step
+                    when = start_time + timedelta(seconds=int(offset))
+                if produced < count and rng.random() < 0.7:
+                    yield self._record(4624, when, user, ip)
+                    produced += 1
+                    offset += step
+                continue
+            event_id = rng.choices(self.event_ids, self.weights)[0]
+            yield self._record(event_id, when)
+            produced += 1
+            offset += step
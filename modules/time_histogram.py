@@ -0,0 +1,120 @@
+# modules/time_histogram.py
+
+import threading
+import numpy as np
+from modules.time_utils import local_utc_offset
+
+class TimeHistogram:
+    """
+    Event counts over time for the dashboard graph, kept as a pyramid of
+    minute, hour and day levels with a prefix sum per level.
+
+    Any zoom is answered from the coarsest level that still gives enough bars:
+    each bar is the difference of two prefix sums, so the cost depends on the
+    number of bars on screen, never on the range or the number of logs.
+    """
+    # (name, seconds per bin, minutes per bin)
+    LEVELS = (("minute", 60, 1), ("hour", 3600, 60), ("day", 86400, 1440))
+
+    def __init__(self, db_handler, max_bars=60):
+        self.db_handler = db_handler
+        self.max_bars = max_bars
+        self.log_sources = None
+        self.keyword = None
+        self.base = None # Epoch of the local midnight the minute array starts at
+        self.minutes = np.zeros(0, dtype=np.int64)
+        self._levels = {}
+        self._lock = threading.Lock()
+
+    def rebuild(self, log_sources=None, keyword=None):
+        """Re-reads per-minute counts for the given sidebar filters (dates are left to zooming)."""
+        rows = self.db_handler.histogram_counts(60, log_sources, keyword)
+        with self._lock:
+            self.log_sources = None if not log_sources or "All" in log_sources else set(log_sources)
+            self.keyword = keyword.lower() if keyword else None
+            if not rows:
+                self.base = None
+                self.minutes = np.zeros(0, dtype=np.int64)
+                self._levels = {}
+                return
+            buckets = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+            counts = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+            self.base = self._local_midnight(int(buckets[0]) * 60)
+            self.minutes = self._padded(int(buckets[-1]) * 60)
+            self.minutes[(buckets * 60 - self.base) // 60] = counts
+            self._build_levels()
+
+    def add(self, logs):
+        """Counts newly monitored logs that match the filters of the last rebuild."""
+        timestamps = [
+            log.get("timestamp") for log in logs
+            if log.get("timestamp") is not None
+            and (self.log_sources is None or log.get("logfile") in self.log_sources)
+            and (self.keyword is None or self.keyword in (log.get("message") or "").lower())
+        ]
+        if not timestamps:
+            return
+        with self._lock:
+            stamps = np.array(timestamps, dtype=np.int64)
+            if self.base is None or stamps.min() < self.base:
+                # Rare: logs older than anything loaded; move the start back to their local midnight
+                new_base = self._local_midnight(int(stamps.min()))
+                shift = 0 if self.base is None else (self.base - new_base) // 60
+                old = self.minutes
+                self.base = new_base
+                self.minutes = np.zeros(shift + len(old), dtype=np.int64)
+                self.minutes[shift:] = old
+            if stamps.max() >= self.base + len(self.minutes) * 60:
+                grown = self._padded(int(stamps.max()))
+                grown[:len(self.minutes)] = self.minutes
+                self.minutes = grown
+            np.add.at(self.minutes, (stamps - self.base) // 60, 1)
+            self._build_levels()
+
+    def bounds(self):
+        """(first, last) epoch of the loaded data, or None when it is empty."""
+        with self._lock:
+            nonzero = np.flatnonzero(self.minutes)
+            if not len(nonzero):
+                return None
+            return self.base + int(nonzero[0]) * 60, self.base + int(nonzero[-1]) * 60 + 59
+
+    def bins(self, start_time, end_time):
+        """
+        Bars covering [start_time, end_time) at the finest level that fits in `max_bars`.
+
+        Returns:
+            tuple: (edges, counts, level_name, bin_seconds) - `edges` has one more
+                   entry than `counts`; or None when there is no data.
+        """
+        with self._lock:
+            if self.base is None:
+                return None
+            for name, seconds, _ in self.LEVELS:
+                if (end_time - start_time) / seconds <= self.max_bars:
+                    break
+            cumulative = self._levels[name]
+            first = (start_time - self.base) // seconds
+            last = -(-(end_time - self.base) // seconds) # Ceiling division
+            indices = np.clip(np.arange(first, last + 1), 0, len(cumulative) - 1)
+            counts = np.diff(cumulative[indices])
+            edges = self.base + np.arange(first, last + 1) * seconds
+            return edges, counts, name, seconds
+
+    # --- Internals ---
+    @staticmethod
+    def _local_midnight(epoch):
+        offset = local_utc_offset()
+        return (epoch + offset) // 86400 * 86400 - offset
+
+    def _padded(self, last_epoch):
+        """A zeroed minute array from `base` through the end of the local day holding `last_epoch`."""
+        days = (last_epoch - self.base) // 86400 + 1
+        return np.zeros(days * 1440, dtype=np.int64)
+
+    def _build_levels(self):
+        # The minute array always spans whole local days, so every level is an exact reshape
+        self._levels = {}
+        for name, _, minutes_per_bin in self.LEVELS:
+            level = self.minutes.reshape(-1, minutes_per_bin).sum(axis=1)
+            self._levels[name] = np.concatenate(([0], np.cumsum(level)))
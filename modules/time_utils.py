@@ -0,0 +1,74 @@
+# modules/time_utils.py
+
+import time
+from datetime import datetime, timedelta, timezone
+
+# Timestamps are stored as integer UTC epoch seconds; local time only appears on screen and in files
+DISPLAY_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Epoch numbers at or above this are taken as milliseconds (it is the year 5138 in seconds)
+MILLISECOND_EPOCH = 10 ** 11
+
+def _scale_epoch(number):
+    """Epoch seconds from an epoch in seconds, milliseconds, microseconds or nanoseconds; None if out of range."""
+    for _ in range(3): # ms, µs, ns
+        if not MILLISECOND_EPOCH <= number < MILLISECOND_EPOCH * 1000 ** 3:
+            break
+        number /= 1000
+    if not 0 <= number < MILLISECOND_EPOCH:
+        return None
+    return int(number)
+
+def now_epoch():
+    return int(time.time())
+
+def to_epoch(value):
+    """
+    Converts a datetime (naive = local time), an epoch number, a numeric string or a
+    '%Y-%m-%d %H:%M:%S' / ISO-8601 string to integer epoch seconds. Millisecond,
+    microsecond and nanosecond epochs (as in JSON exports) are scaled to seconds.
+    Returns None if the value cannot be understood or is out of range.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return _scale_epoch(value) if value == value else None # NaN
+    text = str(value).strip()
+    if text.lstrip("-").isdigit():
+        return _scale_epoch(int(text))
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = datetime.strptime(text[:19], DISPLAY_FORMAT)
+        except ValueError:
+            return None
+    return int(parsed.timestamp())
+
+def format_epoch(epoch, fmt=DISPLAY_FORMAT):
+    """Renders epoch seconds in local time for display and export."""
+    if epoch is None or epoch == "":
+        return ""
+    try:
+        return datetime.fromtimestamp(int(epoch)).strftime(fmt)
+    except (ValueError, OverflowError, OSError):
+        return str(epoch) # Stored before out-of-range epochs were rejected
+
+def date_to_epoch(date_str, days=0):
+    """Epoch of local midnight on a 'YYYY-MM-DD' date, optionally shifted by whole days."""
+    day = datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=days)
+    return int(day.timestamp())
+
+def utc_to_epoch(system_time):
+    """Epoch of a UTC ISO-8601 time such as an EVTX SystemTime ('2024-05-01T10:00:00.123Z')."""
+    if not system_time:
+        return None
+    parsed = datetime.strptime(system_time[:19].replace("T", " "), DISPLAY_FORMAT)
+    return int(parsed.replace(tzinfo=timezone.utc).timestamp())
+
+def local_utc_offset():
+    """The current local UTC offset in seconds, used to align local hour/day buckets."""
+    return int(datetime.now().astimezone().utcoffset().total_seconds())
@@ -2,13 +2,53 @@
 
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
 import bcrypt
 
+DEFAULT_ROUNDS = 12
+MIN_ROUNDS, MAX_ROUNDS = 4, 31 # What bcrypt.gensalt accepts
+
+def _rounds_from_env():
+    """The SECLOG_BCRYPT_ROUNDS cost factor, or the default if it is unset or invalid."""
+    value = os.environ.get("SECLOG_BCRYPT_ROUNDS")
+    if not value:
+        return DEFAULT_ROUNDS
+    try:
+        rounds = int(value)
+    except ValueError:
+        rounds = None
+    if rounds is None or not MIN_ROUNDS <= rounds <= MAX_ROUNDS:
+        print(f"Warning: SECLOG_BCRYPT_ROUNDS={value!r} is not a whole number from {MIN_ROUNDS} to {MAX_ROUNDS}; using {DEFAULT_ROUNDS}.")
+        return DEFAULT_ROUNDS
+    return rounds
+
 class UserAuthenticator:
-    """Handles user creation, authentication, and password management."""
-    def __init__(self, user_file="data/users.json"):
+    """
+    Handles user creation, authentication, and password management.
+
+    Repeated failures lock a username out for `lockout_seconds`, doubling with
+    every further failure up to `max_lockout_seconds`. Locked-out attempts are
+    refused before bcrypt runs, so guessing cannot keep the CPU busy. The
+    counters live in memory only and reset when the app restarts; a username
+    is forgotten once it has been quiet for `max_lockout_seconds`, and at most
+    `max_tracked` usernames are kept (the longest-quiet go first).
+    """
+    def __init__(self, user_file="data/users.json", rounds=None, max_attempts=5,
+                 lockout_seconds=30, max_lockout_seconds=3600, max_tracked=10_000):
         self.user_file = user_file
+        # bcrypt cost factor (log2 of the work); SECLOG_BCRYPT_ROUNDS overrides the default of 12
+        self.rounds = rounds or _rounds_from_env()
+        self.max_attempts = max_attempts
+        self.lockout_seconds = lockout_seconds
+        self.max_lockout_seconds = max_lockout_seconds
+        self.max_tracked = max_tracked
         self.users = self._load_users()
+        # username -> [failed attempts, locked until, last failure] (monotonic), least recently failed first
+        self._failures = OrderedDict()
+        self._lock = threading.Lock() # Guards users and _failures; check_password runs off the UI thread
+        self._dummy_hash = None # Made on first use, off the UI thread
 
     def _load_users(self):
         """Loads user data from the JSON file."""
@@ -18,46 +58,105 @@ class UserAuthenticator:
         return {}
 
     def _save_users(self):
-        """Saves the current user data to the JSON file."""
-        os.makedirs(os.path.dirname(self.user_file), exist_ok=True)
-        with open(self.user_file, 'w') as f:
+        """Saves the user data atomically: a crash mid-write leaves the previous file intact."""
+        directory = os.path.dirname(self.user_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.user_file + ".tmp"
+        with open(temp_path, 'w') as f:
             json.dump(self.users, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.user_file)
 
     def _hash_password(self, password):
-        """Hashes a password using bcrypt."""
-        salt = bcrypt.gensalt()
+        """Hashes a password using bcrypt at the configured cost."""
+        salt = bcrypt.gensalt(self.rounds)
         hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed.decode('utf-8')
 
+    def lockout_remaining(self, username):
+        """Seconds until `username` may try again (0 when not locked out)."""
+        with self._lock:
+            _, locked_until, _ = self._failures.get(username.lower(), (0, 0, 0))
+        return max(locked_until - time.monotonic(), 0)
+
+    def _record_failure(self, username):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._failures.setdefault(username, [0, 0, now])
+            entry[2] = now
+            self._failures.move_to_end(username)
+            self._prune_failures(now)
+            entry[0] += 1
+            extra_failures = entry[0] - self.max_attempts
+            if extra_failures >= 0:
+                delay = min(self.lockout_seconds * 2 ** extra_failures, self.max_lockout_seconds)
+                entry[1] = now + delay
+                print(f"Too many failed logins for '{username}', locked out for {delay}s.")
+
+    def _prune_failures(self, now):
+        """Drops usernames quiet for longer than the longest lockout, then the quietest beyond `max_tracked`."""
+        failures = self._failures
+        while failures:
+            _, locked_until, last_failure = next(iter(failures.values()))
+            if last_failure > now - self.max_lockout_seconds or locked_until > now:
+                break
+            failures.popitem(last=False)
+        while len(failures) > self.max_tracked:
+            failures.popitem(last=False)
+
     def check_password(self, username, password):
         """
         Checks if a provided password matches the stored hash for a user.
-        
+        Slow by design (bcrypt), so call it from a worker thread in the UI.
+
         Returns:
-            bool: True if the password is correct, False otherwise.
+            bool: True if the password is correct, False otherwise (including
+                  while the user is locked out, see `lockout_remaining`).
         """
-        user_data = self.users.get(username.lower())
-        if not user_data:
-            return False # User does not exist
-        
-        stored_hash = user_data['password_hash'].encode('utf-8')
-        return bcrypt.checkpw(password.encode('utf-8'), stored_hash)
+        username = username.lower()
+        if self.lockout_remaining(username) > 0:
+            return False
+        with self._lock:
+            user_data = self.users.get(username)
+        if user_data:
+            stored_hash = user_data['password_hash'].encode('utf-8')
+        else:
+            # Unknown users are checked against a dummy hash so they take as long as a wrong password
+            if self._dummy_hash is None:
+                self._dummy_hash = bcrypt.hashpw(b"", bcrypt.gensalt(self.rounds))
+            stored_hash = self._dummy_hash
+        matches = bcrypt.checkpw(password.encode('utf-8'), stored_hash) and user_data is not None
+        if not matches:
+            self._record_failure(username)
+            return False
+        with self._lock:
+            self._failures.pop(username, None)
+        # Hashes made at another cost are upgraded while the plain password is at hand
+        if int(stored_hash.split(b"$")[2]) != self.rounds:
+            upgraded_hash = self._hash_password(password)
+            with self._lock:
+                self.users[username]["password_hash"] = upgraded_hash
+                self._save_users()
+        return True
 
     def create_user(self, username, password):
         """
         Creates a new user with a hashed password.
-        
+
         Returns:
             bool: True if user was created successfully, False if user already exists.
         """
         if username.lower() in self.users:
             print(f"Error: User '{username}' already exists.")
             return False
-        
+
         hashed_password = self._hash_password(password)
-        self.users[username.lower()] = {
-            "password_hash": hashed_password
-        }
-        self._save_users()
+        with self._lock:
+            self.users[username.lower()] = {
+                "password_hash": hashed_password
+            }
+            self._save_users()
         print(f"Successfully created user: {username}")
-        return True
\ No newline at end of file
+        return True
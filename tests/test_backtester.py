@@ -0,0 +1,37 @@
+# tests/test_backtester.py
+
+import csv
+import gzip
+import pytest
+
+from modules.backtester import Backtester
+from modules.database_handler import DatabaseHandler
+from modules.log_record import LogRecord
+from modules.time_utils import format_epoch, now_epoch
+
+RULE = {"rule_name": "Failed Logins", "description": "", "logfile": "Security", "conditions": {"event_id": "4625"},
+        "aggregation": {"time_window_minutes": 10, "threshold": 5}}
+
+def test_sweep_rejects_thresholds_below_one_and_empty_windows():
+    for window, threshold in ((600, 0), (600, -1), (0, 5)):
+        with pytest.raises(ValueError):
+            Backtester.sweep(window, threshold, [1, 2, 3])
+
+def test_run_skips_rules_with_a_threshold_below_one():
+    assert Backtester(rules=[RULE]).run(0, 100, threshold=0) == []
+
+def test_archived_events_also_in_the_database_are_counted_once(tmp_path):
+    start = now_epoch() - 3600
+    logs = [LogRecord(start + i, "Security", "Auditing", "4625", "Failure Audit", "Warning", f"fail {i}") for i in range(10)]
+    db = DatabaseHandler(db_path=str(tmp_path / "seclog.db"), archive_path=str(tmp_path / "archive"), retention_days=None)
+    db.insert_logs(logs)
+    # Shaped like archive_old_logs output, as if the archive had been re-imported with import_logs
+    archive = tmp_path / "archive.csv.gz"
+    with gzip.open(archive, "wt", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=("id",) + LogRecord.FIELDS)
+        writer.writeheader()
+        writer.writerows(dict(zip(LogRecord.FIELDS, log.as_row()), timestamp=format_epoch(log.timestamp), id=i) for i, log in enumerate(logs))
+
+    alerts = Backtester(db, rules=[RULE]).run(start, start + 60, archive_paths=[str(archive), str(archive)])
+    db.close()
+    assert [alert["count"] for alert in alerts] == [10]
@@ -0,0 +1,110 @@
+# tests/test_ingest_journal.py
+
+import os
+import threading
+import pytest
+
+from modules.database_handler import DatabaseHandler
+from modules.ingest_journal import IngestJournal
+from modules.ingest_pipeline import IngestPipeline
+from modules.log_record import LogRecord
+from modules.time_utils import now_epoch
+
+BATCHES = 6
+BATCH_ROWS = 50
+SEGMENT_BYTES = 1 # One batch per segment, so each commit retires a segment and checkpoints
+
+def _batch(number):
+    start = now_epoch() - 3600
+    return [LogRecord(start + i, "Security", "Test", "4625", "Failure Audit", "Warning", f"batch {number} event {i}")
+            for i in range(BATCH_ROWS)]
+
+def _bookmarks(number):
+    return {"Security": number * BATCH_ROWS}
+
+@pytest.fixture
+def workdir(tmp_path):
+    paths = {name: str(tmp_path / name) for name in ("journal", "spool", "archive")}
+    paths["db"] = str(tmp_path / "seclog.db")
+    return paths
+
+def _open_db(workdir):
+    return DatabaseHandler(db_path=workdir["db"], archive_path=workdir["archive"], retention_days=None)
+
+def _run_pipeline(db, journal, workdir):
+    seen = []
+    pipeline = IngestPipeline(db, lambda logs, counts: seen.append(len(logs)),
+                              spool_dir=workdir["spool"], journal=journal)
+    pipeline.start()
+    assert pipeline.wait_until_idle(timeout=30)
+    pipeline.stop()
+    return seen
+
+def _crash_mid_session(workdir):
+    """Batches 1-3 committed, 4 stored but not yet marked committed, 5-6 only journaled."""
+    db = _open_db(workdir)
+    journal = IngestJournal(workdir["journal"], segment_bytes=SEGMENT_BYTES)
+    for number in range(1, BATCHES + 1):
+        sequence = journal.append(_batch(number), _bookmarks(number))
+        if number <= 4:
+            assert db.insert_logs(_batch(number))
+        if number <= 3:
+            journal.mark_committed(sequence)
+    journal.sync()
+    db.close()
+    # Dropped without close(): no final checkpoint, the last segment keeps its preallocation
+    del journal
+
+def test_crash_recovery_stores_every_row_once(workdir):
+    _crash_mid_session(workdir)
+
+    journal = IngestJournal(workdir["journal"], segment_bytes=SEGMENT_BYTES)
+    assert journal.committed == 3
+    assert journal.committed_bookmarks == _bookmarks(3)
+    assert journal.latest_bookmarks() == _bookmarks(BATCHES)
+
+    db = _open_db(workdir)
+    seen = _run_pipeline(db, journal, workdir)
+    assert sum(seen) == 3 * BATCH_ROWS # Batches 4-6 reach the detector again
+    rows = db.conn.execute("SELECT COUNT(*), COUNT(DISTINCT message) FROM logs").fetchone()
+    assert tuple(rows) == (BATCHES * BATCH_ROWS, BATCHES * BATCH_ROWS)
+    db.close()
+
+    reopened = IngestJournal(workdir["journal"], segment_bytes=SEGMENT_BYTES)
+    assert reopened.committed == BATCHES
+    assert reopened.committed_bookmarks == _bookmarks(BATCHES)
+    assert list(reopened.uncommitted()) == []
+
+    db = _open_db(workdir)
+    assert _run_pipeline(db, reopened, workdir) == [] # Nothing left to replay
+    assert db.conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0] == BATCHES * BATCH_ROWS
+    db.close()
+    assert not [name for name in os.listdir(workdir["journal"]) if name.startswith("segment_")]
+
+class StuckDatabase:
+    """Stores the first batch, then hangs inside the next insert until released."""
+    def __init__(self):
+        self.release = threading.Event()
+        self.inserts = 0
+
+    def insert_logs(self, logs):
+        self.inserts += 1
+        if self.inserts > 1:
+            self.release.wait()
+        return True
+
+def test_stop_checkpoints_when_the_writer_does_not_finish(workdir):
+    db = StuckDatabase()
+    # One large segment: nothing retires, so only stop() can persist the watermark
+    journal = IngestJournal(workdir["journal"])
+    pipeline = IngestPipeline(db, lambda logs, counts: None, spool_dir=workdir["spool"], journal=journal)
+    pipeline.start()
+    pipeline.submit(_batch(1), bookmarks=_bookmarks(1))
+    pipeline.submit(_batch(2), bookmarks=_bookmarks(2))
+    pipeline.stop(timeout=0.5)
+    db.release.set()
+
+    reopened = IngestJournal(workdir["journal"])
+    assert reopened.committed == 1
+    assert reopened.committed_bookmarks == _bookmarks(1)
+    assert [sequence for sequence, _ in reopened.uncommitted()] == [2]
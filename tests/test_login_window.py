@@ -0,0 +1,75 @@
+# tests/test_login_window.py
+
+import threading
+import time
+import pytest
+
+ctk = pytest.importorskip("customtkinter")
+import tkinter as tk
+
+TICK_MS = 10
+MAX_GAP_SECONDS = 0.15 # Several ticks of slack for a loaded machine, well below one slow check
+
+class SlowAuthenticator:
+    """Stands in for UserAuthenticator with a check as slow as a real bcrypt verify."""
+    def __init__(self, delay=0.6):
+        self.delay = delay
+        self.calls = []
+
+    def lockout_remaining(self, username):
+        return 0
+
+    def check_password(self, username, password):
+        self.calls.append(threading.current_thread() is threading.main_thread())
+        time.sleep(self.delay)
+        return password == "secret"
+
+@pytest.fixture
+def root():
+    try:
+        root = ctk.CTk()
+    except tk.TclError as e:
+        pytest.skip(f"No display for Tk: {e}")
+    root.withdraw()
+    yield root
+    try:
+        root.destroy()
+    except tk.TclError:
+        pass
+
+def _run_login(root, password):
+    """Clicks Login from inside the event loop; returns (longest tick gap, window, auth, succeeded)."""
+    from ui_components import LoginWindow
+    auth = SlowAuthenticator()
+    succeeded = []
+    window = LoginWindow(root, auth, lambda: succeeded.append(True))
+    window.username_entry.insert(0, "admin")
+    window.password_entry.insert(0, password)
+    gaps, last = [], [None]
+
+    def tick():
+        now = time.perf_counter()
+        if last[0] is not None:
+            gaps.append(now - last[0])
+        last[0] = now
+        root.after(TICK_MS, tick)
+
+    root.after(0, tick)
+    # Clicked from the loop, so a check on the Tk thread would show up as a tick gap
+    root.after(50, window._login_event)
+    root.after(int((auth.delay + 0.5) * 1000), root.quit)
+    root.mainloop()
+    return max(gaps), window, auth, bool(succeeded)
+
+def test_login_check_keeps_ui_loop_responsive(root):
+    longest_gap, _, auth, succeeded = _run_login(root, "secret")
+    assert auth.calls == [False], "check_password must run off the Tk thread"
+    assert succeeded
+    assert longest_gap < MAX_GAP_SECONDS, f"UI loop stalled for {longest_gap:.3f}s during login"
+
+def test_failed_login_reenables_button(root):
+    longest_gap, window, auth, succeeded = _run_login(root, "wrong")
+    assert not succeeded
+    assert longest_gap < MAX_GAP_SECONDS
+    assert window.login_button.cget("state") == "normal"
+    assert window.status_label.cget("text") == "Invalid username or password."
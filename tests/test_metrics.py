@@ -0,0 +1,52 @@
+# tests/test_metrics.py
+
+import threading
+
+from modules.metrics import PipelineMetrics
+
+def _busy_work():
+    return sum(i * i for i in range(2000))
+
+def test_profiling_from_many_threads_while_dumping(tmp_path):
+    metrics = PipelineMetrics()
+    metrics.enable_profiling("insert,rule_eval")
+    stop = threading.Event()
+    errors = []
+
+    def worker():
+        try:
+            while not stop.is_set():
+                with metrics.stage("insert"):
+                    _busy_work()
+                    with metrics.stage("rule_eval"): # Nested: counted in the insert profile
+                        _busy_work()
+                with metrics.stage("rule_eval"):
+                    _busy_work()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(20):
+            metrics.dump(str(tmp_path / "metrics.json"))
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    metrics.dump(str(tmp_path / "metrics.json"))
+
+    assert errors == []
+    assert metrics.snapshot()["stages"]["insert"]["samples"] > 0
+    for stage in ("insert", "rule_eval"):
+        assert "_busy_work" in (tmp_path / f"profile_{stage}.txt").read_text()
+    # One profiler per thread and stage, none left enabled
+    assert len(metrics._profilers) == 2 * len(threads)
+    assert not metrics._active_profilers
+
+def test_dump_before_any_profiled_stage_ran(tmp_path):
+    metrics = PipelineMetrics()
+    metrics.enable_profiling("insert")
+    metrics.dump(str(tmp_path / "metrics.json"))
+    assert not (tmp_path / "profile_insert.txt").exists()
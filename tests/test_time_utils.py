@@ -0,0 +1,23 @@
+# tests/test_time_utils.py
+
+from modules.log_normalizer import LogNormalizer
+from modules.time_utils import format_epoch, to_epoch
+
+SECONDS = 1714557600 # 2024-05-01 10:00:00 UTC
+
+def test_sub_second_epochs_are_scaled_to_seconds():
+    for value in (SECONDS, SECONDS * 1000, SECONDS * 1000 ** 2, SECONDS * 1000 ** 3, str(SECONDS * 1000)):
+        assert to_epoch(value) == SECONDS
+
+def test_out_of_range_epochs_are_rejected():
+    for value in (-5, 10 ** 30, float("inf"), float("nan"), True):
+        assert to_epoch(value) is None
+
+def test_normalizer_stores_millisecond_epochs_as_seconds():
+    normalizer = LogNormalizer()
+    assert normalizer.normalize("generic", {"timestamp": SECONDS * 1000}).timestamp == SECONDS
+    assert "Unrecognized timestamp" in normalizer.normalize("generic", {"timestamp": 10 ** 30})["error"]
+
+def test_format_epoch_falls_back_to_the_raw_value():
+    assert format_epoch(SECONDS * 1000) == str(SECONDS * 1000)
+    assert format_epoch(SECONDS) != str(SECONDS)
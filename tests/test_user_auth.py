@@ -0,0 +1,36 @@
+# tests/test_user_auth.py
+
+import pytest
+
+pytest.importorskip("bcrypt")
+from modules import user_auth
+from modules.user_auth import UserAuthenticator
+
+@pytest.fixture
+def auth(tmp_path):
+    return UserAuthenticator(user_file=str(tmp_path / "users.json"), rounds=4, max_tracked=50)
+
+def test_failures_for_unknown_usernames_are_capped(auth):
+    for i in range(200):
+        auth.check_password(f"random{i}", "guess")
+    assert len(auth._failures) == auth.max_tracked
+    assert "random199" in auth._failures and "random0" not in auth._failures
+
+def test_quiet_usernames_are_forgotten(auth, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(user_auth.time, "monotonic", lambda: clock[0])
+    for _ in range(auth.max_attempts):
+        auth.check_password("admin", "wrong")
+    assert auth.lockout_remaining("admin") > 0
+    clock[0] += auth.max_lockout_seconds + 1
+    auth.check_password("someone", "wrong")
+    assert list(auth._failures) == ["someone"]
+
+@pytest.mark.parametrize("value", ["twelve", "2", "40", "12.5"])
+def test_invalid_rounds_setting_falls_back_to_the_default(monkeypatch, tmp_path, value):
+    monkeypatch.setenv("SECLOG_BCRYPT_ROUNDS", value)
+    assert UserAuthenticator(user_file=str(tmp_path / "users.json")).rounds == user_auth.DEFAULT_ROUNDS
+
+def test_valid_rounds_setting_is_used(monkeypatch, tmp_path):
+    monkeypatch.setenv("SECLOG_BCRYPT_ROUNDS", "10")
+    assert UserAuthenticator(user_file=str(tmp_path / "users.json")).rounds == 10
@@ -1,11 +1,12 @@
 # ui_components.py
 
+import threading
 import customtkinter as ctk
 import tkinter as tk
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from collections import Counter
-from datetime import datetime
+from matplotlib.ticker import FuncFormatter
+from modules.time_utils import format_epoch
 
 class LoginWindow(ctk.CTkToplevel):
     """
@@ -16,6 +17,7 @@ class LoginWindow(ctk.CTkToplevel):
 
         self.auth = auth_instance
         self.on_success = on_success_callback
+        self.checking = False
         
         self.title("SecLog - Login")
         self.geometry("350x300")
@@ -44,14 +46,37 @@ class LoginWindow(ctk.CTkToplevel):
         self.after(100, lambda: self.geometry(f"350x300+{master.winfo_screenwidth()//2-175}+{master.winfo_screenheight()//2-150}"))
 
     def _login_event(self, event=None):
-        """Handles the login button click or Enter key press."""
+        """Handles the login button click or Enter key press; bcrypt runs on a worker thread."""
+        if self.checking:
+            return # One bcrypt check at a time
         username = self.username_entry.get()
         password = self.password_entry.get()
+        remaining = self.auth.lockout_remaining(username)
+        if remaining > 0:
+            self.status_label.configure(text=f"Too many attempts. Try again in {int(remaining) + 1}s.")
+            return
 
-        if self.auth.check_password(username, password):
+        self.checking = True
+        self.login_button.configure(state="disabled", text="Checking...")
+        self.status_label.configure(text="")
+        threading.Thread(target=self._check_thread, args=(username, password), daemon=True).start()
+
+    def _check_thread(self, username, password):
+        success = self.auth.check_password(username, password)
+        self.after(0, self._login_result, username, success)
+
+    def _login_result(self, username, success):
+        if success:
             print("Login successful!")
             self.destroy() # Close the login window
             self.on_success() # Call the success callback
+            return
+        self.checking = False
+        self.login_button.configure(state="normal", text="Login")
+        self.password_entry.delete(0, tk.END)
+        remaining = self.auth.lockout_remaining(username)
+        if remaining > 0:
+            self.status_label.configure(text=f"Too many attempts. Try again in {int(remaining) + 1}s.")
         else:
             self.status_label.configure(text="Invalid username or password.")
 
@@ -81,7 +106,10 @@ def create_sidebar(parent, app_instance):
     app_instance.filter_entry.grid(row=6, column=0, padx=20, pady=(10, 5), sticky="ew")
     ctk.CTkButton(sidebar, text="🔍 Fetch Logs", command=app_instance.search_logs, height=40).grid(row=7, column=0, padx=20, pady=10, sticky="ew")
     ctk.CTkButton(sidebar, text="🔄 Reset Filters", command=app_instance.reset_filters, height=40).grid(row=8, column=0, padx=20, pady=10, sticky="ew")
-    ctk.CTkButton(sidebar, text="💾 Export to CSV", command=app_instance.save_filtered_logs, height=40).grid(row=9, column=0, padx=20, pady=10, sticky="ew")
+    app_instance.export_button = ctk.CTkButton(sidebar, text="💾 Export Logs", command=app_instance.save_filtered_logs, height=40)
+    app_instance.export_button.grid(row=9, column=0, padx=20, pady=10, sticky="ew")
+    app_instance.cancel_export_button = ctk.CTkButton(sidebar, text="✖ Cancel Export", command=app_instance.cancel_export, height=30, state="disabled")
+    app_instance.cancel_export_button.grid(row=10, column=0, padx=20, pady=(0, 10), sticky="ew")
     ctk.CTkButton(sidebar, text="🌓 Toggle Theme", command=toggle_theme, height=40).grid(row=12, column=0, padx=20, pady=10, sticky="ew")
     ctk.CTkLabel(sidebar, text="v1.2", font=ctk.CTkFont(size=12, slant="italic")).grid(row=17, column=0, pady=(10, 10))
 
@@ -112,6 +140,7 @@ def setup_dashboard_tab(tab, app_instance):
     app_instance.application_card.grid(row=1, column=0, columnspan=3, padx=10, pady=(0, 10), sticky="ew")
     app_instance.graph_frame = ctk.CTkFrame(tab, height=250)
     app_instance.graph_frame.grid(row=2, column=0, columnspan=3, padx=10, pady=(5, 10), sticky="nsew")
+    create_event_graph(app_instance)
 
 def setup_logs_tab(tab, app_instance):
     tab.grid_columnconfigure(0, weight=1)
@@ -125,14 +154,17 @@ def setup_logs_tab(tab, app_instance):
     app_instance.log_textbox.tag_config("Critical", foreground="#d9534f")
 
 def setup_summary_tab(tab, app_instance):
-    tab.grid_columnconfigure((0, 1, 2), weight=1)
+    tab.grid_columnconfigure((0, 1, 2, 3), weight=1)
     tab.grid_rowconfigure(0, weight=1)
     app_instance.event_id_summary_frame = ctk.CTkScrollableFrame(tab, label_text="Event ID Summary")
     app_instance.event_id_summary_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
     app_instance.source_summary_frame = ctk.CTkScrollableFrame(tab, label_text="Source Summary")
     app_instance.source_summary_frame.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
+    app_instance.severity_summary_frame = ctk.CTkScrollableFrame(tab, label_text="Severity Summary")
+    app_instance.severity_summary_frame.grid(row=0, column=2, padx=10, pady=10, sticky="nsew")
     app_instance.event_type_summary_frame = ctk.CTkScrollableFrame(tab, label_text="Event Type Summary")
-    app_instance.event_type_summary_frame.grid(row=0, column=2, padx=10, pady=10, sticky="nsew")
+    app_instance.event_type_summary_frame.grid(row=0, column=3, padx=10, pady=10, sticky="nsew")
+    ctk.CTkLabel(tab, text="Click a value to filter by it; click it again to remove the filter.", text_color="gray").grid(row=1, column=0, columnspan=4, pady=(0, 10))
 
 def setup_alerts_tab(tab, app_instance):
     tab.grid_columnconfigure(0, weight=1)
@@ -142,9 +174,20 @@ def setup_alerts_tab(tab, app_instance):
 
 def setup_incidents_tab(tab, app_instance):
     tab.grid_columnconfigure(0, weight=1)
-    tab.grid_rowconfigure(0, weight=1)
+    tab.grid_rowconfigure(1, weight=1)
+    controls = ctk.CTkFrame(tab, fg_color="transparent")
+    controls.grid(row=0, column=0, padx=10, pady=(10, 0), sticky="ew")
+    ctk.CTkLabel(controls, text="Status:").pack(side="left", padx=(0, 5))
+    ctk.CTkOptionMenu(controls, values=["All", "Open", "Acknowledged", "Closed"], width=140,
+                      command=app_instance.filter_incidents).pack(side="left")
+    app_instance.incident_next_button = ctk.CTkButton(controls, text="Next ▶", width=80, command=lambda: app_instance.change_incident_page(1))
+    app_instance.incident_next_button.pack(side="right")
+    app_instance.incident_page_label = ctk.CTkLabel(controls, text="")
+    app_instance.incident_page_label.pack(side="right", padx=10)
+    app_instance.incident_prev_button = ctk.CTkButton(controls, text="◀ Prev", width=80, command=lambda: app_instance.change_incident_page(-1))
+    app_instance.incident_prev_button.pack(side="right")
     app_instance.incidents_frame = ctk.CTkScrollableFrame(tab, label_text="Managed Incidents")
-    app_instance.incidents_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+    app_instance.incidents_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
 
 def display_alerts(app_instance, alerts_list):
     alerts_frame = app_instance.alerts_frame
@@ -185,6 +228,29 @@ def display_incidents(app_instance, incidents_list):
             ctk.CTkButton(btn_frame, text="Acknowledge", width=100, command=lambda i=incident_id: app_instance.update_incident_status(i, "Acknowledged")).pack(pady=2)
         if status == "Acknowledged":
             ctk.CTkButton(btn_frame, text="Close Incident", width=100, command=lambda i=incident_id: app_instance.update_incident_status(i, "Closed")).pack(pady=2)
+        ctk.CTkButton(btn_frame, text="Evidence", width=100, fg_color="transparent", border_width=1,
+                      command=lambda i=incident: app_instance.show_incident_evidence(i)).pack(pady=2)
+
+def update_incident_pager(app_instance, page, page_count, total):
+    app_instance.incident_page_label.configure(text=f"Page {page + 1} of {page_count} ({total} incidents)")
+    app_instance.incident_prev_button.configure(state="normal" if page > 0 else "disabled")
+    app_instance.incident_next_button.configure(state="normal" if page < page_count - 1 else "disabled")
+
+def show_incident_evidence(app_instance, incident, logs):
+    window = ctk.CTkToplevel(app_instance)
+    window.title(f"Incident #{incident.get('id')} Evidence")
+    window.geometry("900x500")
+    window.transient(app_instance)
+    ctk.CTkLabel(window, text=f"{incident.get('rule_name')} - {len(logs)} linked log(s)", font=ctk.CTkFont(weight="bold")).pack(anchor="w", padx=10, pady=(10, 0))
+    textbox = ctk.CTkTextbox(window, wrap="none", font=("Courier New", 12))
+    textbox.pack(fill="both", expand=True, padx=10, pady=10)
+    for severity, color in (("Info", "#5cb85c"), ("Warning", "#f0ad4e"), ("Critical", "#d9534f")):
+        textbox.tag_config(severity, foreground=color)
+    if logs:
+        display_logs(textbox, logs)
+    else:
+        textbox.insert("1.0", "No evidence linked to this incident (it predates evidence linking, or its logs were archived).")
+        textbox.configure(state="disabled")
 
 def toggle_theme():
     current = ctk.get_appearance_mode()
@@ -197,7 +263,7 @@ def display_logs(textbox, log_list):
         textbox.insert(tk.END, "No logs found matching your criteria.")
     else:
         for log in log_list:
-            line = f"[{log.get('timestamp')}] [{log.get('severity', 'Info')}] {log.get('source')} (ID {log.get('event_id')}): {log.get('message')}\n"
+            line = f"[{format_epoch(log.get('timestamp'))}] [{log.get('severity', 'Info')}] {log.get('source')} (ID {log.get('event_id')}): {log.get('message')}\n"
             severity = log.get('severity', 'Info')
             textbox.insert(tk.END, line, severity)
     textbox.see("1.0")
@@ -209,61 +275,89 @@ def update_summary_cards(app_instance, total_logs_count, counts_by_type):
     app_instance.system_card.configure(text=f"⚙️ System: {counts_by_type.get('System', 0)}")
     app_instance.application_card.configure(text=f"🧩 Application: {counts_by_type.get('Application', 0)}")
 
-def update_summary_tab(app_instance, logs):
-    frames = [app_instance.event_id_summary_frame, app_instance.source_summary_frame, app_instance.event_type_summary_frame]
-    for frame in frames:
+# (facet, summary frame attribute, label format)
+SUMMARY_FACETS = (
+    ("event_id", "event_id_summary_frame", "ID {}"),
+    ("source", "source_summary_frame", "{}"),
+    ("severity", "severity_summary_frame", "{}"),
+    ("event_type", "event_type_summary_frame", "{}"),
+)
+
+def update_summary_tab(app_instance, facet_counts, selections):
+    """Lists the top values per facet with live counts; each one toggles a facet filter."""
+    for facet, frame_name, label in SUMMARY_FACETS:
+        frame = getattr(app_instance, frame_name)
         for widget in frame.winfo_children():
             widget.pack_forget()
             widget.destroy()
-    if not logs: return
-    event_ids = Counter(log.get("event_id") for log in logs)
-    sources = Counter(log.get("source") for log in logs)
-    event_types = Counter(log.get("event_type") for log in logs)
-    for eid, count in event_ids.most_common(20):
-        label = ctk.CTkLabel(app_instance.event_id_summary_frame, text=f"ID {eid}: {count} events", anchor="w")
-        label.pack(fill="x", padx=5, pady=2)
-    for source, count in sources.most_common(20):
-        label = ctk.CTkLabel(app_instance.source_summary_frame, text=f"{source}: {count} events", anchor="w")
-        label.pack(fill="x", padx=5, pady=2)
-    for etype, count in event_types.most_common(20):
-        label = ctk.CTkLabel(app_instance.event_type_summary_frame, text=f"{etype}: {count} events", anchor="w")
-        label.pack(fill="x", padx=5, pady=2)
-
-def draw_event_graph(parent_frame, logs):
-    for widget in parent_frame.winfo_children(): widget.destroy()
-    if not logs:
-        ctk.CTkLabel(parent_frame, text="No data to display.").pack(expand=True)
+        selected = selections.get(facet, set())
+        entries = list(facet_counts.get(facet, []))
+        # Selected values stay listed (at 0) so they can always be switched off again
+        shown = {value for value, _ in entries}
+        entries += [(value, 0) for value in selected if value not in shown]
+        for value, count in entries:
+            is_selected = value in selected
+            # Selected values keep the theme's filled button; the rest are outlined
+            style = {} if is_selected else {"fg_color": "transparent", "border_width": 1}
+            ctk.CTkButton(
+                frame, text=f"{'✔ ' if is_selected else ''}{label.format(value)}: {count} events", anchor="w",
+                command=lambda f=facet, v=value: app_instance.toggle_facet(f, v), **style
+            ).pack(fill="x", padx=5, pady=2)
+
+GRAPH_LABEL_FORMATS = {"minute": "%H:%M", "hour": "%m-%d %H:00", "day": "%Y-%m-%d"}
+
+def create_event_graph(app_instance):
+    """Builds the dashboard's single event graph; draw_event_graph only updates its data."""
+    app_instance.graph_level = "hour"
+    app_instance.graph_bin_seconds = 3600
+    fig = Figure(figsize=(8, 4), dpi=100)
+    ax = fig.add_subplot(111)
+    line, = ax.plot([], [], drawstyle="steps-post", linewidth=1.5)
+    ax.set_ylabel("Number of Events")
+    ax.xaxis.set_major_formatter(FuncFormatter(
+        lambda x, _: format_epoch(x, GRAPH_LABEL_FORMATS[app_instance.graph_level])))
+    canvas = FigureCanvasTkAgg(fig, master=app_instance.graph_frame)
+    canvas.get_tk_widget().pack(fill="both", expand=True, padx=5, pady=5)
+    # Left click drills into a bar, right click zooms back out to the sidebar filters
+    canvas.mpl_connect("button_press_event", lambda event: _on_graph_click(app_instance, event))
+    app_instance.graph_figure, app_instance.graph_axes, app_instance.graph_line = fig, ax, line
+    app_instance.graph_canvas = canvas
+
+def _on_graph_click(app_instance, event):
+    if event.inaxes is not app_instance.graph_axes:
         return
-    try:
-        timestamps = [datetime.strptime(log['timestamp'], "%Y-%m-%d %H:%M:%S") for log in logs if 'timestamp' in log]
-        if not timestamps:
-             ctk.CTkLabel(parent_frame, text="No timestamp data for graph.").pack(expand=True)
-             return
-        time_bins = [ts.strftime("%Y-%m-%d %H:00") for ts in timestamps]
-        time_counts = Counter(time_bins)
-        sorted_times = sorted(time_counts.keys())[-24:]
-        counts = [time_counts[t] for t in sorted_times]
-        short_labels = [t.split(' ')[1] for t in sorted_times]
-        fig = Figure(figsize=(8, 4), dpi=100)
-        ax = fig.add_subplot(111)
-        bar_color = "#4e73df" if ctk.get_appearance_mode() == "Dark" else "#3366cc"
-        ax.bar(short_labels, counts, color=bar_color)
-        bg_color = "#2b2b2b" if ctk.get_appearance_mode() == "Dark" else "#f0f0f0"
-        text_color = "white" if ctk.get_appearance_mode() == "Dark" else "black"
-        fig.patch.set_facecolor(bg_color)
-        ax.set_facecolor(bg_color)
-        ax.xaxis.label.set_color(text_color)
-        ax.yaxis.label.set_color(text_color)
-        ax.title.set_color(text_color)
-        ax.tick_params(axis='x', colors=text_color, rotation=45)
-        ax.tick_params(axis='y', colors=text_color)
-        ax.set_title("Event Count Over Time (Last 24 Hours)")
-        ax.set_xlabel("Time (Hour of Day)")
-        ax.set_ylabel("Number of Events")
-        fig.tight_layout()
-        canvas = FigureCanvasTkAgg(fig, master=parent_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True, padx=5, pady=5)
-    except Exception as e:
-        print(f"Error drawing graph: {e}")
-        ctk.CTkLabel(parent_frame, text=f"Could not draw graph:\n{e}").pack(expand=True)
\ No newline at end of file
+    if event.button == 3:
+        app_instance.reset_graph_zoom()
+    elif event.button == 1 and event.xdata is not None:
+        edges = app_instance.graph_line.get_xdata()
+        if len(edges) < 2: return
+        bin_seconds = app_instance.graph_bin_seconds
+        start = int(edges[0] + (event.xdata - edges[0]) // bin_seconds * bin_seconds)
+        app_instance.drill_down_graph(start, start + bin_seconds)
+
+def draw_event_graph(app_instance, histogram_bins):
+    """Updates the event graph in place from TimeHistogram.bins output (or None)."""
+    fig, ax, line = app_instance.graph_figure, app_instance.graph_axes, app_instance.graph_line
+    bar_color = "#4e73df" if ctk.get_appearance_mode() == "Dark" else "#3366cc"
+    bg_color = "#2b2b2b" if ctk.get_appearance_mode() == "Dark" else "#f0f0f0"
+    text_color = "white" if ctk.get_appearance_mode() == "Dark" else "black"
+    fig.patch.set_facecolor(bg_color)
+    ax.set_facecolor(bg_color)
+    ax.yaxis.label.set_color(text_color)
+    ax.title.set_color(text_color)
+    ax.tick_params(axis='x', colors=text_color, rotation=30)
+    ax.tick_params(axis='y', colors=text_color)
+    line.set_color(bar_color)
+    if histogram_bins is None:
+        line.set_data([], [])
+        ax.set_title("No data to display.")
+    else:
+        edges, counts, level, bin_seconds = histogram_bins
+        app_instance.graph_level, app_instance.graph_bin_seconds = level, bin_seconds
+        # steps-post needs the last count repeated so the final bar gets its right edge
+        line.set_data(edges, list(counts) + [counts[-1] if len(counts) else 0])
+        ax.set_xlim(edges[0], edges[-1])
+        ax.set_ylim(0, max(max(counts, default=0) * 1.1, 1))
+        ax.set_title(f"Event Count Over Time (per {level}, click to drill down, right-click to reset)")
+    fig.tight_layout()
+    app_instance.graph_canvas.draw_idle()